@@ -2,10 +2,13 @@
 
 import sys
 import logging
+import functools
 import numpy as np
-import shutil
 import os
-import matplotlib.pyplot as plt
+
+# Live plotting only on request (DMFT_INTERACTIVE=1); otherwise the GUI-free
+# Agg backend is used and the convergence plot is drawn once at the end.
+INTERACTIVE = os.environ.get("DMFT_INTERACTIVE", "0") == "1"
 
 def setup_logging():
     """
@@ -45,33 +48,155 @@ from modules.realparts import execute_realparts, RealPartsError
 from modules.sigmatrick import execute_sigmatrick, SigmaTrickError
 # Note: now we import execute_dmft in a way that we can call execute_dmft(iteration_index=...)
 from modules.dmft import execute_dmft, DMFTError
+from modules.anderson import apply_anderson_mixing
+from modules.broyden import BroydenMixer, BroydenMixingError
 
-def check_convergence(old_data, new_data, eps_delta=1e-4):
+def create_mixer(mixing_method, alpha):
     """
-    Checks convergence by comparing two arrays.
-    
-    Returns a tuple (is_converged, max_difference), where:
-      - is_converged is True if the maximum absolute difference is below eps_delta.
-      - max_difference is the calculated maximum difference.
+    Builds the Delta mixer used by the DMFT loop.
+
+    Returns:
+        None for 'none', otherwise a callable
+        mixer(old_delta, new_delta, mixing_parameter).
+        'broyden' keeps its history across iterations (BroydenMixer).
+
+    Raises:
+        ValueError: If the mixing method is unknown.
+    """
+    if mixing_method == "none":
+        return None
+    if mixing_method == "anderson":
+        return apply_anderson_mixing
+    if mixing_method == "broyden":
+        return BroydenMixer(mixing_parameter=alpha).mix
+    raise ValueError(f"Unknown mixing_method '{mixing_method}'. Use 'none', 'anderson' or 'broyden'.")
+
+def adapt_mixing_parameter(alpha, conv_history, stall_count,
+                           stall_ratio=1.0, stall_limit=2, factor=0.5, alpha_min=0.02):
+    """
+    Decays the mixing parameter when the DMFT loop stagnates.
+
+    conv_history holds the unmixed residuals max|Delta_out - Delta_in|. An
+    iteration counts as stalled when its residual is not below stall_ratio
+    times the previous one. After stall_limit consecutive stalled iterations,
+    alpha is multiplied by factor (but kept >= alpha_min).
+
+    stall_ratio defaults to 1.0 (residual not decreasing), not 0.9: with
+    linear mixing the residual shrinks by about 1 - alpha*(1 - s) per
+    iteration for a DMFT map of slope s, i.e. by more than 0.9 whenever
+    alpha <= 0.1 and s > 0. A 0.9 threshold would then halve alpha during
+    steady convergence, which only makes every following step slower.
+    A residual that stops decreasing (oscillation, divergence) is what
+    a smaller alpha cures.
+
+    Returns:
+        tuple: (alpha, stall_count) to use for the next iteration.
+    """
+    if len(conv_history) < 2:
+        return alpha, stall_count
+
+    if conv_history[-1] >= stall_ratio * conv_history[-2]:
+        stall_count += 1
+    else:
+        stall_count = 0
+
+    if stall_count >= stall_limit and alpha > alpha_min:
+        new_alpha = max(alpha * factor, alpha_min)
+        logger.info(f"Convergence stalled for {stall_count} iterations; "
+                    f"reducing mixing parameter {alpha:.4g} -> {new_alpha:.4g}")
+        return new_alpha, 0
+
+    return alpha, stall_count
+
+def aitken_mu_bracket(mu_history, width_factor=1.5, max_jump=10.0):
     """
-    diff = np.max(np.abs(old_data - new_data))
-    return (diff < eps_delta), diff
+    Aitken delta-squared extrapolation of mu over the DMFT iterations.
+
+    From the last three values mu_{k-2}, mu_{k-1}, mu_k the limit
+    mu_acc = mu_{k-2} - (mu_{k-1} - mu_{k-2})^2 / (mu_k - 2 mu_{k-1} + mu_{k-2})
+    is estimated and a bracket of half-width width_factor*|mu_k - mu_{k-1}|
+    around it is returned for the next root search.
+
+    Returns:
+        tuple or None: (mu_min, mu_max), or None if there is too little history
+        or the extrapolation jumps more than max_jump steps away from mu_k.
+    """
+    if len(mu_history) < 3:
+        return None
+    mu0, mu1, mu2 = mu_history[-3:]
+    step = abs(mu2 - mu1)
+    denom = mu2 - 2.0*mu1 + mu0
+    if step == 0.0 or denom == 0.0:
+        return None
+    mu_acc = mu0 - (mu1 - mu0)**2 / denom
+    if not np.isfinite(mu_acc) or abs(mu_acc - mu2) > max_jump*step:
+        return None
+    half_width = width_factor*step
+    return (mu_acc - half_width, mu_acc + half_width)
+
+def warm_start_mu_bracket(mu_history, min_half_width=0.1):
+    """
+    Bracket for the next root search around the last mu found:
+    mu_prev -/+ max(min_half_width, 2*|last change of mu|).
+
+    Returns:
+        tuple or None: (mu_min, mu_max), or None before the first DMFT step.
+    """
+    if not mu_history:
+        return None
+    mu_prev = mu_history[-1]
+    last_step = abs(mu_history[-1] - mu_history[-2]) if len(mu_history) > 1 else 0.0
+    half_width = max(min_half_width, 2.0*last_step)
+    return (mu_prev - half_width, mu_prev + half_width)
+
+def load_pyplot():
+    """
+    Imports matplotlib.pyplot on first use (matplotlib is slow to import).
+    The backend is selected here, once, before any figure exists: TkAgg in
+    interactive mode (live windows, also for the mu search in dmft.py),
+    Agg otherwise.
+    """
+    import matplotlib
+    matplotlib.use("TkAgg" if INTERACTIVE else "Agg")  # or 'QtAgg' if you want a live window
+    import matplotlib.pyplot as plt
+    return plt
+
+def create_convergence_plot(eps_delta):
+    """
+    Creates the figure for the convergence behavior of Delta.
+
+    Returns:
+        tuple: (fig, ax, line), where line holds the convergence values.
+    """
+    plt = load_pyplot()
+    fig, ax = plt.subplots()
+    line, = ax.plot([], [], 'bo-', label=r'$\|\Delta - \Delta_{\mathrm{prev}}\|$')
+    ax.axhline(y=eps_delta, color='r', linestyle='--', label=r'$\epsilon_{\Delta}$')
+
+    ax.set_title(r'$\mathrm{Convergence\ Behavior:}\ \max|\Delta(\omega) - \Delta_{\mathrm{prev}}(\omega)|$')
+    ax.set_xlabel(r'$\mathrm{Iteration}$')
+    ax.set_ylabel(r'$\mathrm{Convergence\ Value}$')
+    ax.legend()
+    return fig, ax, line
 
 def main_dmft_loop(mixing_method, alpha):
     """
     Executes the main DMFT loop.
 
     1) If Delta.dat does not exist, an initial guess for Delta is generated.
-    2) Convergence is determined by comparing Delta.dat and Delta.dat.prev,
-       which is assumed to be updated automatically (e.g., by dmft.py).
-    3) A plot is updated at each iteration to display the convergence behavior
-       of the hybridization function.
+    2) Convergence is determined by the residual max|Delta_out - Delta_in| of
+       the DMFT step, i.e. the new Delta before mixing against the Delta.dat
+       used as input for the iteration. The Delta written by each step is
+       kept in memory as the input of the next one, so Delta.dat is not
+       parsed again. The same residual drives the adaptive mixing parameter.
+    3) The convergence behavior of the hybridization function is recorded at
+       each iteration; with DMFT_INTERACTIVE=1 a live plot is updated as well.
     4) When convergence is achieved or the maximum iteration is reached,
        the plot is saved to convergence.pdf, then closed.
     
     Args:
-        mixing_method (str): Mixing method parameter (parsed for compatibility, but not used).
-        alpha (float): Mixing parameter (parsed for compatibility, but not used).
+        mixing_method (str): Mixing method for Delta ('none', 'anderson' or 'broyden').
+        alpha (float): Initial mixing parameter; reduced adaptively when convergence stalls.
     """
     # Display ASCII banner
     display_banner()
@@ -81,21 +206,27 @@ def main_dmft_loop(mixing_method, alpha):
     max_iter = int(params.get("max_iter", 10))
     eps_delta = float(params.get("eps_delta", 1e-4))
 
+    try:
+        mixer = create_mixer(mixing_method, alpha)
+    except (ValueError, BroydenMixingError) as e:
+        logger.error(f"Mixing setup error: {e}")
+        sys.exit(1)
+    logger.info(f"Mixing method: {mixing_method} (alpha = {alpha})")
+
     converged = False
+    prev_delta = None  # Delta.dat written by the last DMFT step, kept in memory
+    stall_count = 0
+    mu_history = []  # mu found in each DMFT step, to extrapolate the next one
 
-    # Initialize interactive plot for Delta.dat convergence
-    plt.ion()
-    fig, ax = plt.subplots()
+    plt = load_pyplot()
+
+    # Convergence history of Delta.dat (plotted live only in interactive mode)
     convergence_list = []
     iteration_list = []
-    line, = ax.plot([], [], 'bo-', label=r'$\|\Delta - \Delta_{\mathrm{prev}}\|$')
-    ax.axhline(y=eps_delta, color='r', linestyle='--', label=r'$\epsilon_{\Delta}$')
-
-    ax.set_title(r'$\mathrm{Convergence\ Behavior:}\ \max|\Delta(\omega) - \Delta_{\mathrm{prev}}(\omega)|$')
-    ax.set_xlabel(r'$\mathrm{Iteration}$')
-    ax.set_ylabel(r'$\mathrm{Convergence\ Value}$')
-    ax.legend()
-    plt.show()
+    if INTERACTIVE:
+        plt.ion()
+        fig, ax, line = create_convergence_plot(eps_delta)
+        plt.show()
 
     for iteration in range(1, max_iter + 1):
         logger.info(f"=== DMFT Iteration {iteration} ===\n")
@@ -165,48 +296,63 @@ def main_dmft_loop(mixing_method, alpha):
         logger.info(f"Running DMFT step (iteration {iteration})...")
         try:
             # Pass iteration index => produce a unique bisection_convergence PDF each time
-            execute_dmft(iteration_index=iteration)
+            mu_found, residual, prev_delta = execute_dmft(
+                iteration_index=iteration,
+                mixer=functools.partial(mixer, mixing_parameter=alpha) if mixer else None,
+                mu_bracket=aitken_mu_bracket(mu_history) or warm_start_mu_bracket(mu_history),
+                prev_delta=prev_delta,
+                live_plot=INTERACTIVE
+            )
+            mu_history.append(mu_found)
             logger.info("DMFT step completed.")
         except DMFTError as e:
             logger.error(f"DMFT error: {e}")
             sys.exit(1)
 
-        # STEP 8: Convergence check: Delta.dat vs. Delta.dat.prev
-        conv_val = None
-        if os.path.exists("Delta.dat.prev"):
-            try:
-                delta_current = np.loadtxt("Delta.dat")[:, 1]
-                delta_prev    = np.loadtxt("Delta.dat.prev")[:, 1]
-            except Exception as e:
-                logger.error(f"Error reading Delta files: {e}")
-                sys.exit(1)
-
-            is_converged, conv_val = check_convergence(delta_prev, delta_current, eps_delta)
-            logger.info(f"Iteration {iteration}: Delta difference = {conv_val:.3e} "
-                        f"(eps_delta = {eps_delta:.3e}, Ratio = {conv_val/eps_delta:.3f})")
-
-            if is_converged:
-                logger.info(f"Hybridization function Delta converged at iteration {iteration}!")
-                converged = True
+        # STEP 8: Convergence check on the unmixed residual of the DMFT step.
+        # Comparing the mixed Delta.dat with its input would only measure
+        # alpha*residual. Without a residual (the frequency grid changed),
+        # the iteration counts as not converged and is recorded as NaN.
+        if residual is not None:
+            is_converged, conv_val = (residual < eps_delta), residual
         else:
-            logger.debug("Delta.dat.prev not found; skipping convergence check this iteration.")
-            conv_val = float('nan')
+            logger.info(f"Iteration {iteration}: no residual (frequency grid of Delta changed); "
+                        f"not converged.")
+            is_converged, conv_val = False, float("nan")
+        logger.info(f"Iteration {iteration}: Delta difference = {conv_val:.3e} "
+                    f"(eps_delta = {eps_delta:.3e}, Ratio = {conv_val/eps_delta:.3f})")
+
+        if is_converged:
+            logger.info(f"Hybridization function Delta converged at iteration {iteration}!")
+            converged = True
+
+        # Adaptive mixing: reduce alpha when the convergence stagnates
+        if mixer is not None and residual is not None:
+            alpha, stall_count = adapt_mixing_parameter(
+                alpha, convergence_list + [conv_val], stall_count
+            )
 
         # Update the hybridization convergence plot
         iteration_list.append(iteration)
         convergence_list.append(conv_val)
-        line.set_data(iteration_list, convergence_list)
+        if INTERACTIVE:
+            line.set_data(iteration_list, convergence_list)
 
-        ax.relim()
-        ax.autoscale_view()
-        plt.draw()
-        plt.pause(0.1)
+            ax.relim()
+            ax.autoscale_view()
+            plt.draw()
+            plt.pause(0.1)
 
         if converged:
             break
 
     # After the DMFT loop
     logger.info("Saving convergence graph to 'convergence.pdf' and closing.")
+    if not INTERACTIVE:
+        fig, ax, line = create_convergence_plot(eps_delta)
+        line.set_data(iteration_list, convergence_list)
+        ax.relim()
+        ax.autoscale_view()
     plt.savefig("convergence.pdf")
     plt.close(fig)
 
@@ -0,0 +1,58 @@
+# modules/_logging.py
+"""
+Shared logger setup for the DMFT modules: one log file per module
+(file_level and above) plus the console (INFO and above).
+"""
+
+import os
+import logging
+from logging.handlers import RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def level_from_env(variable, default=logging.INFO):
+    """
+    Log level named by the environment variable (e.g. 'INFO', 'DEBUG'),
+    or default if it is unset or not a valid level name. The INFO default
+    keeps per-line DEBUG records out of the log files unless requested.
+    """
+    level = logging.getLevelName(os.environ.get(variable, "").upper())
+    return level if isinstance(level, int) else default
+
+def setup_module_logger(name, logfile, file_level=logging.DEBUG, max_bytes=0, backup_count=0):
+    """
+    Returns the logger 'name', configured on first use only.
+
+    Args:
+        name (str): Logger name (usually the module's __name__).
+        logfile (str): File receiving the records of level file_level and above.
+        file_level (int): Level of the file handler. The logger's own level is
+            min(file_level, INFO), so DEBUG calls return immediately unless
+            the file records them.
+        max_bytes (int): If > 0, the file is rotated at this size
+            (RotatingFileHandler with backup_count old files).
+
+    The file is only opened once the first record is written (delay=True), and
+    propagation to the root logger is disabled to prevent duplication.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(min(file_level, logging.INFO))
+
+    if not logger.handlers:
+        # File Handler: Record file_level and above in logfile
+        if max_bytes > 0:
+            fh = RotatingFileHandler(logfile, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        else:
+            fh = logging.FileHandler(logfile, delay=True)
+        fh.setLevel(file_level)
+        fh.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(fh)
+
+        # Console Handler: Display only INFO and above in the console
+        ch = logging.StreamHandler()
+        ch.setLevel(logging.INFO)
+        ch.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(ch)
+
+    logger.propagate = False
+    return logger
@@ -5,16 +5,21 @@ Anderson Mixing Module
 Implements the Anderson mixing method to assist in self-energy convergence.
 
 Logging:
-   - All routine steps are logged at DEBUG into 'Anderson.log'.
+   - All routine steps are logged at DEBUG into 'anderson.log'.
    - Only INFO-level messages (errors and warnings) are displayed on the console.
 """
 
-import logging
+import numpy as np
+
+from ._logging import setup_module_logger
 
 class AndersonMixingError(Exception):
     """Custom exception for errors in anderson.py."""
     pass
 
+# Configure the logger for this module: DEBUG+ in 'anderson.log', INFO+ on the console
+logger = setup_module_logger('anderson', 'anderson.log')
+
 def apply_anderson_mixing(old_delta, new_delta, mixing_parameter=0.1):
     """
     Applies Anderson mixing to update Delta.dat.
@@ -30,26 +35,6 @@ def apply_anderson_mixing(old_delta, new_delta, mixing_parameter=0.1):
     Raises:
         AndersonMixingError: If inputs are invalid or mixing fails.
     """
-    # Initialize logger inside the function
-    logger = logging.getLogger('anderson')
-    if not logger.handlers:
-        # File Handler captures all logs (DEBUG+) in Anderson.log
-        fh = logging.FileHandler('anderson.log')
-        fh.setLevel(logging.DEBUG)  # Capture DEBUG and above in the file
-        fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(fh_formatter)
-        logger.addHandler(fh)
-
-        # Console Handler only shows INFO+ (i.e., errors)
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)  # Capture INFO and above on console
-        ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        ch.setFormatter(ch_formatter)
-        logger.addHandler(ch)
-
-        # Disable propagation to prevent duplication
-        logger.propagate = False
-
     logger.debug("Starting Anderson mixing.")
     try:
         if old_delta is None:
@@ -61,10 +46,13 @@ def apply_anderson_mixing(old_delta, new_delta, mixing_parameter=0.1):
             logger.info(msg)
             raise AndersonMixingError(msg)
 
-        logger.debug(f"Mixing parameter: {mixing_parameter}")
+        logger.debug("Mixing parameter: %s", mixing_parameter)
 
         # Simple linear mixing: delta_new = alpha * new_delta + (1 - alpha) * old_delta
-        mixed_delta = mixing_parameter * new_delta + (1 - mixing_parameter) * old_delta
+        # Evaluated as old + alpha*(new - old) in a single buffer (no temporaries)
+        mixed_delta = np.subtract(new_delta, old_delta, dtype=np.float64)
+        mixed_delta *= mixing_parameter
+        mixed_delta += old_delta
         logger.debug("Anderson mixing applied successfully.")
 
         return mixed_delta
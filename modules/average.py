@@ -3,38 +3,40 @@
 import os
 import sys
 import re
+import shlex
 import logging
 import subprocess
 import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from ._logging import setup_module_logger, level_from_env
+
 class AverageModuleError(Exception):
     """Custom exception for errors in average.py."""
     pass
 
-# Configure logging for average.py
-logger = logging.getLogger(__name__)
-
-# Set the logger's level to DEBUG to capture all messages
-logger.setLevel(logging.DEBUG)
-
-if not logger.handlers:
-    # File Handler: Record DEBUG and above in 'average.log'
-    fh = logging.FileHandler('average.log')
-    fh.setLevel(logging.DEBUG)
-    fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    fh.setFormatter(fh_formatter)
-    logger.addHandler(fh)
-
-    # Console Handler: Display only INFO and above in the console
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(ch_formatter)
-    logger.addHandler(ch)
-
-    # **Disable propagation to prevent duplication**
-    logger.propagate = False
+# Configure logging for average.py: INFO+ on the console and in 'average.log'.
+# DEBUG records (param.loop lines, broaden output) go to the file only with
+# AVERAGE_LOG_LEVEL=DEBUG, as for SIGMATRICK_LOG_LEVEL in sigmatrick.py.
+logger = setup_module_logger(__name__, 'average.log', file_level=level_from_env("AVERAGE_LOG_LEVEL"))
+
+# Results of parse_param_loop keyed by (path, mtime_ns, size) of the file
+_PARAM_CACHE = {}
+
+# Patterns used by parse_param_loop (compiled once at import).
+# _LINE_RE scans the whole file at once; per line it matches a #PRELUDE line,
+# a section header or a 'key = value' assignment ([^\S\n] = blank, not newline).
+_LINE_RE = re.compile(
+    r'^[^\S\n]*(?:'
+    r'#PRELUDE:[^\S\n]*(?P<prelude>.*)'
+    r'|(?P<section>\[.*)'
+    r'|(?P<key>\w+)[^\S\n]*=[^\S\n]*(?P<value>\S.*)'
+    r')',
+    re.MULTILINE
+)
+_VAR_RE = re.compile(r'\$(\w+)\s*=\s*([^;]+);?')
 
 def parse_param_loop(filepath):
     """
@@ -50,9 +52,6 @@ def parse_param_loop(filepath):
     logger.debug(f"Parsing param.loop from: {filepath}")
 
     params = {}
-    prelude_pattern = re.compile(r'^#PRELUDE:\s*(.*)')
-    variable_pattern = re.compile(r'\$(\w+)\s*=\s*([^;]+);?')
-    param_pattern = re.compile(r'(\w+)\s*=\s*(.+)')
     section = None
 
     if not os.path.isfile(filepath):
@@ -61,36 +60,40 @@ def parse_param_loop(filepath):
         logger.info(msg)
         raise AverageModuleError(msg)
 
+    # param.loop rarely changes between DMFT iterations => reuse the last result
+    stat = os.stat(filepath)
+    cache_key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+    cached = _PARAM_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug(f"Using cached parameters for: {filepath}")
+        return dict(cached)
+
     try:
         with open(filepath, 'r') as file:
-            for line_number, line in enumerate(file, 1):
-                stripped_line = line.strip()
-                logger.debug(f"Line {line_number}: {stripped_line}")
-
-                prelude_match = prelude_pattern.match(stripped_line)
-                if prelude_match:
-                    prelude_content = prelude_match.group(1)
-                    logger.debug(f"Found PRELUDE content: '{prelude_content}'")
-                    for var_match in variable_pattern.finditer(prelude_content):
-                        key, value = var_match.groups()
-                        params[key.strip()] = value.strip()
-                        logger.debug(f"Found PRELUDE variable '{key}' = '{value}'")
-                    continue
-
-                if not stripped_line or stripped_line.startswith("#"):
-                    continue
-
-                if stripped_line.startswith("["):
-                    section = stripped_line.strip("[]").lower()
-                    logger.debug(f"Entering section [{section}]")
-                    continue
-
-                if section in ["extra", "param"]:
-                    param_match = param_pattern.match(stripped_line)
-                    if param_match:
-                        key, value = param_match.groups()
-                        params[key.strip()] = value.strip()
-                        logger.debug(f"Found parameter '{key}' = '{value}'")
+            text = file.read()
+
+        # Single regex scan over the whole file instead of a Python loop per line
+        for match in _LINE_RE.finditer(text):
+            prelude_content = match.group('prelude')
+            if prelude_content is not None:
+                prelude_content = prelude_content.strip()
+                logger.debug("Found PRELUDE content: '%s'", prelude_content)
+                for var_match in _VAR_RE.finditer(prelude_content):
+                    key, value = var_match.groups()
+                    params[key.strip()] = value.strip()
+                    logger.debug("Found PRELUDE variable '%s' = '%s'", key, value)
+                continue
+
+            section_header = match.group('section')
+            if section_header is not None:
+                section = section_header.strip().strip("[]").lower()
+                logger.debug("Entering section [%s]", section)
+                continue
+
+            if section in ["extra", "param"]:
+                key, value = match.group('key'), match.group('value')
+                params[key.strip()] = value.strip()
+                logger.debug("Found parameter '%s' = '%s'", key, value)
 
         if 'Nz' not in params:
             msg = "Missing 'Nz' parameter in param.loop."
@@ -99,6 +102,7 @@ def parse_param_loop(filepath):
 
         params['Nz'] = int(params['Nz'])
         logger.debug(f"Converted 'Nz' to integer: {params['Nz']}")
+        _PARAM_CACHE[cache_key] = dict(params)
         return params
 
     except AverageModuleError:
@@ -108,63 +112,91 @@ def parse_param_loop(filepath):
         logger.info(msg)
         raise AverageModuleError(msg)
 
-def broaden_command(fn, out, params, broaden_exec="broaden"):
+def broaden_command(fn, out, params, broaden_exec="broaden", cwd=None):
     """
     Executes 'broaden' at the top-level directory. 'broaden' internally handles 1/, 2/, etc.
+
+    If cwd is given, 'broaden' runs there instead (see _make_broaden_workdir) and
+    its spec.dat is taken from that directory, so several runs can be concurrent.
     """
-    cmd = (
-        f"{broaden_exec} "
-        f"-x {params['broaden_gamma']} "
-        f"-m {params['broaden_min']} "
-        f"-M {params['broaden_max']} "
-        f"-r {params['broaden_ratio']} "
-        f"{fn} {params['Nz']} {params['broaden_alpha']} {params['T']} 1e-99"
-    )
+    # Arguments are passed as a list (no shell), so parameter values are never
+    # interpreted by /bin/sh, whatever characters they contain
+    cmd = [
+        str(broaden_exec),
+        "-x", str(params['broaden_gamma']),
+        "-m", str(params['broaden_min']),
+        "-M", str(params['broaden_max']),
+        "-r", str(params['broaden_ratio']),
+        str(fn), str(params['Nz']), str(params['broaden_alpha']), str(params['T']), "1e-99"
+    ]
+    cmd_str = shlex.join(cmd)  # properly quoted, for log messages only
 
     # Log at DEBUG
-    logger.debug(f"Executing command: {cmd}")
+    logger.debug(f"Executing command: {cmd_str}")
+
+    # The (long) stdout of 'broaden' is only captured (and decoded) if it will be
+    # logged; stderr is always captured so that errors can be reported.
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
     try:
-        process = subprocess.Popen(
+        result = subprocess.run(
             cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
+            stdout=subprocess.PIPE if debug_enabled else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
             env=os.environ.copy()  # Using current environment without modifying DYLD_LIBRARY_PATH
         )
-
-        # Log each line at DEBUG for normal operation
-        for line in process.stdout:
-            logger.debug(line.strip())
-
-        process.wait()
-        if process.returncode != 0:
-            msg = f"Command '{cmd}' exited with return code {process.returncode}"
+        stderr_text = result.stderr.decode(errors="replace").strip()
+
+        if debug_enabled:
+            if result.stdout:
+                logger.debug(result.stdout.decode(errors="replace").rstrip())
+            if stderr_text:
+                logger.debug(stderr_text)
+
+        if result.returncode != 0:
+            msg = f"Command '{cmd_str}' exited with return code {result.returncode}"
+            if stderr_text:
+                msg += f": {stderr_text}"
             logger.info(msg)  # Log error at INFO
             raise AverageModuleError(msg)
         else:
             # Successful => keep at DEBUG
-            logger.debug(f"Command '{cmd}' completed successfully.")
+            logger.debug(f"Command '{cmd_str}' completed successfully.")
+    except AverageModuleError:
+        raise
     except Exception as e:
-        msg = f"Unexpected error running '{cmd}': {e}"
+        msg = f"Unexpected error running '{cmd_str}': {e}"
         logger.info(msg)
         raise AverageModuleError(msg)
 
     # Move spec.dat -> out
-    if not os.path.exists("spec.dat"):
+    spec_path = os.path.join(cwd, "spec.dat") if cwd else "spec.dat"
+    if not os.path.exists(spec_path):
         msg = "spec.dat was not generated by the broaden command."
         logger.info(msg)
         raise AverageModuleError(msg)
 
     try:
-        shutil.move("spec.dat", out)
-        logger.debug(f"Moved 'spec.dat' to '{out}'")
+        shutil.move(spec_path, out)
+        logger.debug(f"Moved '{spec_path}' to '{out}'")
     except Exception as e:
         msg = f"Error moving 'spec.dat': {e}"
         logger.info(msg)
         raise AverageModuleError(msg)
 
+def _make_broaden_workdir(Nz):
+    """
+    Creates a private working directory for one 'broaden' run.
+
+    The z-step directories 1/, 2/, ..., Nz/ are symlinked into it, so 'broaden'
+    finds its input as usual while writing its own spec.dat.
+    """
+    workdir = tempfile.mkdtemp(prefix="broaden_", dir=".")
+    for index in range(1, Nz + 1):
+        os.symlink(os.path.abspath(str(index)), os.path.join(workdir, str(index)))
+    return workdir
+
 def execute_average():
     """
     Main entry point for averaging operation. 
@@ -190,10 +222,30 @@ def execute_average():
     ]
 
     logger.debug(f"Files to process: {files_to_process}")
-    logger.debug("Executing 'broaden_command' for each file...")
+    logger.debug("Executing 'broaden_command' concurrently for each file...")
 
-    for fn, out in files_to_process:
-        logger.debug(f"Processing file: {fn} -> {out}")
-        broaden_command(fn, out, params)
+    # The 'broaden' runs are independent => run them in parallel, each in its own
+    # working directory so they do not race on spec.dat
+    workdirs = []
+    try:
+        for _ in files_to_process:
+            workdirs.append(_make_broaden_workdir(params['Nz']))
+
+        with ThreadPoolExecutor(max_workers=len(files_to_process)) as executor:
+            futures = []
+            for (fn, out), workdir in zip(files_to_process, workdirs):
+                logger.debug(f"Processing file: {fn} -> {out} (in '{workdir}')")
+                futures.append(executor.submit(broaden_command, fn, out, params, cwd=workdir))
+            for future in futures:
+                future.result()
+    except AverageModuleError:
+        raise
+    except Exception as e:
+        msg = f"Error during parallel broadening: {e}"
+        logger.info(msg)
+        raise AverageModuleError(msg)
+    finally:
+        for workdir in workdirs:
+            shutil.rmtree(workdir, ignore_errors=True)
 
     logger.debug("All averaging steps completed successfully.")
\ No newline at end of file
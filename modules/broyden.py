@@ -4,18 +4,141 @@ Broyden Mixing Module
 
 Implements the Broyden mixing method to assist in self-energy convergence.
 
+BroydenMixer keeps a short history of residuals F = Delta_out - Delta_in and
+performs modified Broyden (Johnson) mixing across DMFT iterations, which
+typically needs far fewer iterations than linear mixing
+(R. Zitko, Phys. Rev. B 80, 125125 (2009)).
+apply_broyden_mixing is the stateless linear-mixing variant.
+
 Logging:
-   - All routine steps are logged at DEBUG into 'Broyden.log'.
+   - All routine steps are logged at DEBUG into 'broyden.log'.
    - Only INFO-level messages (errors and warnings) are displayed on the console.
 """
 
-import logging
 import numpy as np
 
+from ._logging import setup_module_logger
+
 class BroydenMixingError(Exception):
     """Custom exception for errors in broyden.py."""
     pass
 
+# Configure the logger for this module: DEBUG+ in 'broyden.log', INFO+ on the console
+logger = setup_module_logger('broyden', 'broyden.log')
+
+class BroydenMixer:
+    """
+    Modified Broyden mixer with a history of the last `history` iterations.
+
+    For the input Delta x_k and the output g(x_k) of iteration k, with the
+    residual F_k = g(x_k) - x_k, the next input is
+
+        x_{k+1} = x_k + alpha*F_k - sum_i gamma_i (dx_i + alpha*dF_i),
+
+    where dx_i, dF_i are the (normalized) differences of consecutive inputs
+    and residuals, and gamma solves (A + w0^2 I) gamma = dF . F_k with
+    A_ij = dF_i . dF_j. Without history this reduces to linear mixing.
+
+    Usage:
+        mixer = BroydenMixer(mixing_parameter=0.1)
+        delta_in_next = mixer.mix(delta_in, delta_out)
+    """
+
+    def __init__(self, mixing_parameter=0.1, history=5, w0=0.01):
+        if not (0 < mixing_parameter <= 1):
+            raise BroydenMixingError(
+                f"Invalid mixing parameter: {mixing_parameter}. Must be between 0 and 1."
+            )
+        if history < 1:
+            raise BroydenMixingError(f"Invalid history length: {history}. Must be >= 1.")
+        self.mixing_parameter = mixing_parameter
+        self.history = history
+        self.w0 = w0
+        self.reset()
+
+    def reset(self):
+        """Discards the stored history (e.g. after the frequency grid changed)."""
+        self.dx_hist = []
+        self.dF_hist = []
+        self._x_prev = None
+        self._F_prev = None
+
+    def mix(self, old_delta, new_delta, mixing_parameter=None):
+        """
+        Returns the mixed Delta to be used as input for the next iteration.
+
+        Args:
+            old_delta (numpy.ndarray): Input Delta of the current iteration.
+            new_delta (numpy.ndarray): Output Delta of the current iteration.
+            mixing_parameter (float, optional): New alpha (0 < alpha <= 1) to
+                use from now on, e.g. from an adaptive schedule.
+
+        Returns:
+            numpy.ndarray: Mixed Delta values.
+
+        Raises:
+            BroydenMixingError: If inputs are invalid or mixing fails.
+        """
+        logger.debug("Starting Broyden mixing (history-based).")
+        try:
+            if mixing_parameter is not None:
+                if not (0 < mixing_parameter <= 1):
+                    raise BroydenMixingError(
+                        f"Invalid mixing parameter: {mixing_parameter}. Must be between 0 and 1."
+                    )
+                self.mixing_parameter = mixing_parameter
+
+            if old_delta is None:
+                logger.debug("No previous Delta found. Using new Delta without mixing.")
+                return new_delta
+
+            x = np.asarray(old_delta, dtype=np.float64)
+            F = np.asarray(new_delta, dtype=np.float64) - x
+            if x.shape != F.shape:
+                raise BroydenMixingError(
+                    f"Shape mismatch between old {x.shape} and new {F.shape} Delta."
+                )
+
+            if self._x_prev is not None and self._x_prev.shape != x.shape:
+                logger.debug("Delta shape changed; resetting Broyden history.")
+                self.reset()
+
+            # Update the history with the latest differences, normalized by |dF|
+            if self._x_prev is not None:
+                dF = F - self._F_prev
+                norm = np.linalg.norm(dF)
+                if norm > 0.0:
+                    self.dF_hist.append(dF / norm)
+                    self.dx_hist.append((x - self._x_prev) / norm)
+                    if len(self.dF_hist) > self.history:
+                        self.dF_hist.pop(0)
+                        self.dx_hist.pop(0)
+
+            self._x_prev = x
+            self._F_prev = F
+
+            alpha = self.mixing_parameter
+            mixed_delta = np.multiply(F, alpha)
+            mixed_delta += x
+            m = len(self.dF_hist)
+            if m > 0:
+                dF_mat = np.array(self.dF_hist)
+                dx_mat = np.array(self.dx_hist)
+                A = dF_mat @ dF_mat.T + self.w0**2 * np.eye(m)
+                gamma = np.linalg.solve(A, dF_mat @ F)
+                mixed_delta -= gamma @ (dx_mat + alpha * dF_mat)
+
+            logger.debug("Broyden mixing applied with %d history vectors, alpha = %s.", m, alpha)
+            return mixed_delta
+
+        except BroydenMixingError as e:
+            logger.info(str(e))
+            raise
+        except Exception as e:
+            msg = f"Error during Broyden mixing: {e}"
+            logger.info(msg)
+            raise BroydenMixingError(msg)
+
 def apply_broyden_mixing(old_delta, new_delta, mixing_parameter=0.1):
     """
     Applies Broyden mixing to update Delta.dat.
@@ -31,26 +154,6 @@ def apply_broyden_mixing(old_delta, new_delta, mixing_parameter=0.1):
     Raises:
         BroydenMixingError: If inputs are invalid or mixing fails.
     """
-    # Initialize logger inside the function
-    logger = logging.getLogger('broyden')
-    if not logger.handlers:
-        # File Handler captures all logs (DEBUG+) in Broyden.log
-        fh = logging.FileHandler('broyden.log')
-        fh.setLevel(logging.DEBUG)  # Capture DEBUG and above in the file
-        fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(fh_formatter)
-        logger.addHandler(fh)
-
-        # Console Handler only shows INFO+ (i.e., errors)
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)  # Capture INFO and above on console
-        ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        ch.setFormatter(ch_formatter)
-        logger.addHandler(ch)
-
-        # Disable propagation to prevent duplication
-        logger.propagate = False
-
     logger.debug("Starting Broyden mixing.")
     try:
         if old_delta is None:
@@ -62,12 +165,15 @@ def apply_broyden_mixing(old_delta, new_delta, mixing_parameter=0.1):
             logger.info(msg)
             raise BroydenMixingError(msg)
 
-        logger.debug(f"Mixing parameter: {mixing_parameter}")
+        logger.debug("Mixing parameter: %s", mixing_parameter)
 
         # Placeholder for Broyden's method. A full implementation would require storing history.
         # Here, we'll perform a simple linear mixing as a placeholder.
 
-        mixed_delta = mixing_parameter * new_delta + (1 - mixing_parameter) * old_delta
+        # Evaluated as old + alpha*(new - old) in a single buffer (no temporaries)
+        mixed_delta = np.subtract(new_delta, old_delta, dtype=np.float64)
+        mixed_delta *= mixing_parameter
+        mixed_delta += old_delta
         logger.debug("Broyden mixing applied successfully.")
 
         return mixed_delta
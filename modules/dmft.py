@@ -3,16 +3,17 @@
 A Python module that replicates the original DMFT shell script +
 embedded Mathematica logic. Performs:
 
-1) Copies Delta.dat -> Delta.dat.prev (if Delta.dat exists)
+1) Snapshots Delta.dat -> Delta.dat.prev (hard link, if Delta.dat exists)
 2) Reads resigma.dat (Re(sigma)) and imsigma.dat (Im(sigma)) => sigma(omega)
-3) Defines htDOS(...) and computes G_loc, A(omega)
+3) Computes G_loc = htDOS(omega - sigma) and A(omega)
 4) Writes G_loc.dat, imaw.dat, reaw.dat
 5) Computes new Delta.dat from G_loc, sigma
 6) Calls "kk Delta.dat Delta-re.dat" at the end
-7) Finally, solves for chemical potential mu such that integrated spectral
-   function = n_target, using user-provided mu_min, mu_max, and max_iter.
+7) Finally, solves (Brent's method) for chemical potential mu such that
+   integrated spectral function = n_target, using user-provided mu_min,
+   mu_max, and max_iter.
 
-It plots, in real time, the convergence of:
+It plots (live only if execute_dmft(live_plot=True)) the convergence of:
    - F(mu) = n(mu) - n_target
    - mu
 vs. iteration, and closes the plot at the end,
@@ -21,16 +22,13 @@ saving a unique PDF file to avoid overwriting.
 
 import os
 import math
-import cmath
 import shutil
 import subprocess
-import logging
-import matplotlib
-matplotlib.use('TkAgg')  # or 'QtAgg' if you want a live window
-import matplotlib.pyplot as plt
+import numpy as np
 from datetime import datetime
 
 from .parameter_parser import get_parameters
+from ._logging import setup_module_logger
 
 class DMFTError(Exception):
     """Custom exception for errors in dmft.py."""
@@ -39,102 +37,132 @@ class DMFTError(Exception):
 # -------------------------------------------------------------------
 # Configure logger for this module
 # -------------------------------------------------------------------
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-
-if not logger.handlers:
-    # File Handler captures all logs (DEBUG+) in dmft.log
-    fh = logging.FileHandler('dmft.log')
-    fh.setLevel(logging.DEBUG)
-    fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    fh.setFormatter(fh_formatter)
-    logger.addHandler(fh)
-
-    # Console Handler only shows INFO+ (errors/warnings) on screen
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(ch_formatter)
-    logger.addHandler(ch)
-
-logger.propagate = False
+# File Handler captures all logs (DEBUG+) in dmft.log,
+# Console Handler only shows INFO+ (errors/warnings) on screen
+logger = setup_module_logger(__name__, 'dmft.log')
 
 
 def _read_two_column_data(filename):
-    """Read 2-col text (omega, value)."""
-    data = []
+    """Read 2-col text (omega, value) => (N, 2) float array."""
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if (not line) or line.startswith('#'):
-                    continue
-                parts = line.split()
-                if len(parts) >= 2:
-                    x = float(parts[0])
-                    y = float(parts[1])
-                    data.append((x, y))
+        return np.loadtxt(filename, comments='#', usecols=(0, 1), ndmin=2, dtype=np.float64)
     except FileNotFoundError:
         raise DMFTError(f"{filename} not found.")
     except Exception as e:
         raise DMFTError(f"Error reading {filename}: {e}")
-    return data
 
 def _write_two_column_data(filename, data):
-    """Write list of (omega, value) to text file."""
+    """Write (N, 2) array of (omega, value) to text file."""
     try:
-        with open(filename, 'w') as f:
-            for (x, y) in data:
-                f.write(f"{x} {y}\n")
+        np.savetxt(filename, np.asarray(data, dtype=np.float64).reshape(-1, 2), fmt='%.17g %.17g')
     except Exception as e:
         raise DMFTError(f"Error writing {filename}: {e}")
 
 
+# |(omega - mu)/T| beyond which the Fermi function is taken as exactly 0 or 1
+_FERMI_CLIP = 40.0
+
 def fermi_dirac(omega, mu, T):
-    """Fermi–Dirac distribution."""
+    """Fermi–Dirac distribution (scalar utility; the mu search uses fermi_dirac_array)."""
     if T < 1e-12:
         return 1.0 if (omega - mu) < 0 else 0.0
     exponent = (omega - mu) / T
-    if exponent > 40.0:
+    if exponent > _FERMI_CLIP:
         return 0.0
-    elif exponent < -40.0:
+    elif exponent < -_FERMI_CLIP:
         return 1.0
     return 1.0 / (math.exp(exponent) + 1.0)
 
-def compute_occupation(mu, A_data, T):
-    """Trapezoidal integration of A(omega)*f(omega,mu,T)."""
-    if len(A_data) < 2:
+def fermi_dirac_array(omega, mu, T):
+    """
+    Fermi–Dirac distribution on a numpy array omega. The exponent is clipped
+    to [-_FERMI_CLIP, _FERMI_CLIP] in one pass instead of branching per point.
+    """
+    if T < 1e-12:
+        return ((omega - mu) < 0).astype(np.float64)
+    x = np.clip((omega - mu) / T, -_FERMI_CLIP, _FERMI_CLIP)
+    return 1.0 / (np.exp(x) + 1.0)
+
+def compute_occupation(mu, omega, A, T):
+    """
+    Trapezoidal integration of A(omega)*f(omega,mu,T).
+
+    omega, A: numpy arrays on the (sorted) frequency grid.
+    Vectorized: the Fermi function is evaluated on the whole grid at once
+    (fermi_dirac_array).
+    """
+    if len(omega) < 2:
         return 0.0
-    occ = 0.0
-    for i in range(len(A_data)-1):
-        w1, A1 = A_data[i]
-        w2, A2 = A_data[i+1]
-        f1 = fermi_dirac(w1, mu, T)
-        f2 = fermi_dirac(w2, mu, T)
-        dw = (w2 - w1)
-        occ += 0.5*(A1*f1 + A2*f2)*dw
-    return occ
-
-
-def find_mu_for_occupation(A_data, n_target, T, eps_n, mu_min, mu_max, max_iter, iteration_label=None):
+    integrand = A * fermi_dirac_array(omega, mu, T)
+    return float(0.5 * np.dot(np.diff(omega), integrand[:-1] + integrand[1:]))
+
+
+# Largest |exponent| tabulated by _occupation_evaluator (exp(700) ~ 1e304)
+_LUT_MAX_EXP = 700.0
+
+def _occupation_evaluator(omega, A, T):
     """
-    Bisection to find mu s.t. n(mu) = n_target.
-    Also shows a live, iteration-by-iteration plot of:
-      - F(mu) = n(mu) - n_target
-      - mu
+    Returns a function n(mu) equivalent to compute_occupation(mu, omega, A, T)
+    for a fixed grid. Work buffers are allocated once and all array operations
+    write into them (out=), so repeated calls in the mu search allocate nothing.
 
-    iteration_label: optional string to embed in output filename
+    Only mu changes between calls, so exp(omega/T) is tabulated once and
+    f = 1/(1 + exp(-mu/T)*exp(omega/T)) costs one scalar exp per call.
     """
+    n = len(omega)
+    if n < 2:
+        return lambda mu: 0.0
+
+    buf = np.empty(n)
+    mask = np.empty(n, dtype=bool)
+    pair = np.empty(n - 1)
+    dw = np.diff(omega)  # trapezoid widths: the grid is fixed, compute them once
+
+    # Table of exp(omega/T); the exponent is clipped to avoid overflow. Entries
+    # that hit the clip are exact enough (f ~ 0 or 1) as long as |mu/T| stays
+    # well below _LUT_MAX_EXP; beyond that, the direct formula is used instead.
+    exp_omega = None
+    if T >= 1e-12:
+        exp_omega = np.exp(np.clip(omega / T, -_LUT_MAX_EXP, _LUT_MAX_EXP))
+
+    def occupation(mu):
+        if T < 1e-12:
+            np.subtract(omega, mu, out=buf)
+            np.less(buf, 0.0, out=mask)
+            np.multiply(A, mask, out=buf)
+        elif abs(mu / T) < _LUT_MAX_EXP - 100.0:
+            with np.errstate(over='ignore'):  # inf => f = 0, as intended
+                np.multiply(exp_omega, math.exp(-mu / T), out=buf)
+            np.add(buf, 1.0, out=buf)
+            np.divide(A, buf, out=buf)       # A(omega)*f(omega)
+        else:
+            np.subtract(omega, mu, out=buf)
+            np.divide(buf, T, out=buf)
+            np.clip(buf, -_FERMI_CLIP, _FERMI_CLIP, out=buf)
+            np.exp(buf, out=buf)
+            np.add(buf, 1.0, out=buf)
+            np.divide(A, buf, out=buf)       # A(omega)*f(omega)
+        np.add(buf[:-1], buf[1:], out=pair)
+        return 0.5 * float(np.dot(dw, pair))
 
-    plt.ion()
+    return occupation
 
-    # Create figure, subplots
-    fig, (axF, axMu) = plt.subplots(2, 1, figsize=(6, 8))
-    fig.suptitle(r'$\mathrm{Real\!-\!time\ Bisection\ Convergence}$')
 
-    iters = []
-    fvals = []  # F(mu_i) = n(mu_i) - n_target
-    mus   = []
+# Times find_mu_for_occupation may widen a bracket without a sign change
+_MAX_BRACKET_EXPANSIONS = 10
+
+class _MuFound(Exception):
+    """Raised inside the root search once |n(mu) - n_target| < eps_n."""
+    def __init__(self, mu, f):
+        super().__init__(mu, f)
+        self.mu = mu
+        self.f = f
+
+
+def _create_mu_plot(plt):
+    """Figure with F(mu_i) and mu_i vs. iteration; returns (fig, axF, axMu, lineF, lineM)."""
+    fig, (axF, axMu) = plt.subplots(2, 1, figsize=(6, 8))
+    fig.suptitle(r'$\mathrm{Root\ Search\ Convergence}$')
 
     lineF, = axF.plot([], [], 'o-b', label=r'$F(\mu_i)\!=\!n(\mu_i)-n_{\mathrm{target}}$')
     lineM, = axMu.plot([], [], 'o-r', label=r'$\mu_i$')
@@ -149,50 +177,118 @@ def find_mu_for_occupation(A_data, n_target, T, eps_n, mu_min, mu_max, max_iter,
     axMu.set_ylabel(r'$\mu$')
     axMu.grid(True)
     axMu.legend()
+    return fig, axF, axMu, lineF, lineM
 
-    f_min = compute_occupation(mu_min, A_data, T) - n_target
-    f_max = compute_occupation(mu_max, A_data, T) - n_target
-    converged = False
-    mu_mid = 0.5*(mu_min + mu_max)
-    f_mid = None
 
+def find_mu_for_occupation(omega, A, n_target, T, eps_n, mu_min, mu_max, max_iter,
+                           iteration_label=None, live_plot=False):
+    """
+    Brent's method (scipy.optimize.brentq) to find mu s.t. n(mu) = n_target.
+    omega, A: numpy arrays of the spectral function A(omega), sorted by omega.
+    Converged means |n(mu) - n_target| < eps_n, as for the former bisection;
+    Brent typically needs far fewer n(mu) evaluations to get there.
+    Plots, evaluation by evaluation:
+      - F(mu) = n(mu) - n_target
+      - mu
+
+    iteration_label: optional string to embed in output filename
+    live_plot: if True, the plot is updated during the search (debugging; needs
+               an interactive matplotlib backend, see main.load_pyplot);
+               otherwise it is drawn once, after the search, and only saved.
+    """
+    # matplotlib and scipy are imported lazily: they are slow to import and only needed here.
+    # The backend is the one selected by the caller (main.load_pyplot).
+    from scipy.optimize import brentq
+    import matplotlib.pyplot as plt
+
+    iters = []
+    fvals = []  # F(mu_i) = n(mu_i) - n_target
+    mus   = []
+
+    if live_plot:
+        plt.ion()
+        fig, axF, axMu, lineF, lineM = _create_mu_plot(plt)
+
+    occupation = _occupation_evaluator(omega, A, T)
     iteration_data = []
 
-    for i in range(max_iter):
-        mu_mid = 0.5*(mu_min + mu_max)
-        occ_mid = compute_occupation(mu_mid, A_data, T)
-        f_mid = occ_mid - n_target
+    evaluated = {}  # mu -> F(mu), so brentq does not redo the bracket endpoints
 
-        iteration_data.append((i, mu_mid, f_mid))
+    def F(mu):
+        # Wrapper around n(mu) - n_target that records every evaluation
+        if mu in evaluated:
+            return evaluated[mu]
+        f = occupation(mu) - n_target
+        evaluated[mu] = f
+        i = len(iteration_data)
+        iteration_data.append((i, mu, f))
 
         iters.append(i)
-        mus.append(mu_mid)
-        fvals.append(f_mid)
+        mus.append(mu)
+        fvals.append(f)
+
+        if live_plot:
+            lineF.set_data(iters, fvals)
+            lineM.set_data(iters, mus)
+
+            axF.relim()
+            axF.autoscale_view()
+            axMu.relim()
+            axMu.autoscale_view()
+
+            fig.canvas.draw_idle()
+            plt.pause(0.001)
+
+        # stop as soon as the occupation is within eps_n of the target
+        if abs(f) < eps_n:
+            raise _MuFound(mu, f)
+        return f
 
+    converged = False
+    try:
+        # No sign change in [mu_min, mu_max] => n(mu) is flat or the bracket is off.
+        # n(mu) grows with mu, so move the endpoint on the side of the root
+        # outwards, doubling the step each time, instead of failing right away.
+        step = max(mu_max - mu_min, 1e-3)
+        f_lo, f_hi = F(mu_min), F(mu_max)
+        for _ in range(_MAX_BRACKET_EXPANSIONS):
+            if f_lo*f_hi <= 0.0:
+                break
+            logger.debug(f"No sign change in [{mu_min}, {mu_max}]; expanding the bracket.")
+            if f_hi < 0.0:
+                mu_min, f_lo = mu_max, f_hi
+                mu_max += step
+                f_hi = F(mu_max)
+            else:
+                mu_max, f_hi = mu_min, f_lo
+                mu_min -= step
+                f_lo = F(mu_min)
+            step *= 2.0
+
+        mu_mid, _ = brentq(F, mu_min, mu_max, xtol=1e-14, maxiter=max(1, max_iter),
+                           full_output=True, disp=False)
+        f_mid = occupation(mu_mid) - n_target
+        converged = abs(f_mid) < eps_n
+    except _MuFound as found:
+        mu_mid, f_mid = found.mu, found.f
+        converged = True
+    except ValueError:
+        # F(mu_min) and F(mu_max) have the same sign => no root in the bracket;
+        # fall back to the endpoint closest to the target
+        _, mu_mid, f_mid = min(iteration_data, key=lambda entry: abs(entry[2]))
+        logger.warning(f"n(mu) - n_target does not change sign in [{mu_min}, {mu_max}]; "
+                       f"using mu = {mu_mid}.")
+
+    if not live_plot:
+        # Render the whole history once, now that the search is done
+        fig, axF, axMu, lineF, lineM = _create_mu_plot(plt)
         lineF.set_data(iters, fvals)
         lineM.set_data(iters, mus)
-
         axF.relim()
         axF.autoscale_view()
         axMu.relim()
         axMu.autoscale_view()
 
-        plt.draw()
-        plt.pause(0.5)
-
-        # check convergence
-        if abs(f_mid) < eps_n:
-            converged = True
-            break
-
-        # bisection step
-        if f_min * f_mid > 0.0:
-            mu_min = mu_mid
-            f_min  = f_mid
-        else:
-            mu_max = mu_mid
-            f_max  = f_mid
-
     # Generate a unique filename so we don't overwrite previous PDFs
     if iteration_label is not None:
         out_pdf = f"bisection_convergence_step_{iteration_label}.pdf"
@@ -201,26 +297,46 @@ def find_mu_for_occupation(A_data, n_target, T, eps_n, mu_min, mu_max, max_iter,
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         out_pdf = f"bisection_convergence_{timestamp}.pdf"
 
-    plt.savefig(out_pdf)
-    logger.info(f"Bisection convergence plot saved to '{out_pdf}'")
+    fig.savefig(out_pdf)
+    logger.info(f"Root search convergence plot saved to '{out_pdf}'")
     plt.close(fig)
 
     if not converged:
-        logger.warning(f"Bisection did not converge after {max_iter} iterations.")
+        logger.warning(f"Root search for mu did not converge after {max_iter} iterations.")
 
     return mu_mid, f_mid, converged, iteration_data
 
 
-def execute_dmft(iteration_index=None):
+def execute_dmft(iteration_index=None, mixer=None, mu_bracket=None, prev_delta=None,
+                 live_plot=False):
     """
     Main routine that does:
      - read parameters
      - compute spectral function, G_loc
-     - do the bisection for mu (with real-time plot)
+     - optionally mix the new Delta with the previous one
+     - do the root search for mu (plot saved as PDF)
      - close the plot at the end
 
     iteration_index: optional integer or string. If provided, we embed
                      it in the bisection PDF filename to avoid overwriting.
+    mixer: optional callable mixer(old_delta, new_delta) -> mixed_delta
+           acting on the Im(Delta) arrays. It is applied before Delta.dat
+           is written, so Delta-re.dat is computed from the mixed values.
+    mu_bracket: optional (mu_min, mu_max) to search first, e.g. extrapolated
+                from previous iterations. If no root is found in it, the
+                mu_min/mu_max of param.loop are used instead.
+    prev_delta: optional (N, 2) array (omega, Im Delta) of the input Delta.dat,
+                i.e. the delta_arr returned by the previous call. Without it,
+                Delta.dat.prev is read from disk.
+    live_plot: if True, the mu search is plotted live. The caller decides
+               (main.py: DMFT_INTERACTIVE=1) and must have selected an
+               interactive matplotlib backend.
+
+    Returns:
+        tuple: (mu, residual, delta_arr), the chemical potential found, the
+        residual max|Delta_new - Delta_in| of the unmixed new Delta against the
+        input Delta (None if there was no input Delta on the same grid), and
+        the (N, 2) array written to Delta.dat.
     """
 
     logger.debug("Starting DMFT steps (execute_dmft).")
@@ -236,10 +352,19 @@ def execute_dmft(iteration_index=None):
     logger.debug(f"Loaded params: n_target={n_target}, T={T}, eps_n={eps_n}, "
                  f"mu_min={mu_min}, mu_max={mu_max}, max_mu_iter={max_mu_iter}")
 
-    # Step A: Copy Delta.dat -> Delta.dat.prev if it exists
+    # Step A: Snapshot Delta.dat -> Delta.dat.prev if it exists. A hard link
+    # costs no I/O; Delta.dat is later replaced by a new file (see Step D),
+    # so the linked snapshot keeps the old contents. Copy if linking fails.
     if os.path.exists("Delta.dat"):
         try:
-            shutil.copy("Delta.dat", "Delta.dat.prev")
+            try:
+                os.remove("Delta.dat.prev")
+            except FileNotFoundError:
+                pass
+            try:
+                os.link("Delta.dat", "Delta.dat.prev")
+            except OSError:
+                shutil.copy("Delta.dat", "Delta.dat.prev")
         except Exception as e:
             raise DMFTError(f"Error copying Delta.dat->Delta.dat.prev: {e}")
 
@@ -249,100 +374,116 @@ def execute_dmft(iteration_index=None):
     if not os.path.exists("imsigma.dat"):
         raise DMFTError("'imsigma.dat' not found.")
 
-    resigma_data = _read_two_column_data("resigma.dat")
-    imsigma_data = _read_two_column_data("imsigma.dat")
-    if len(resigma_data) != len(imsigma_data):
+    resigma_arr = _read_two_column_data("resigma.dat")
+    imsigma_arr = _read_two_column_data("imsigma.dat")
+    if len(resigma_arr) != len(imsigma_arr):
         raise DMFTError("resigma.dat and imsigma.dat differ in length.")
 
-    # Combine
-    sigma = []
-    for (r_om, r_val), (i_om, i_val) in zip(resigma_data, imsigma_data):
-        if abs(r_om - i_om) > 1e-12:
-            raise DMFTError("Mismatch in omega for resigma/imsigma.")
-        sigma.append((r_om, complex(r_val, i_val)))
-
-    # Step C: define htDOS, compute G_loc
-    def htDOS0(z):
-        sgn = 1.0 if z.imag > 0 else -1.0
-        tmp = cmath.sqrt(1.0 - z*z)
-        correction = complex(0, -sgn)*tmp
-        return 2.0*(z + correction)
-
-    def htDOS(z):
-        EPS = 1e-20
-        re_z = z.real
-        im_z = z.imag if z.imag > 0 else EPS
-        return htDOS0(complex(re_z, im_z))
-
-    G_loc = []
-    for (om, sig) in sigma:
-        zval = complex(om, 0) - sig
-        G_val = htDOS(zval)
-        G_loc.append((om, G_val))
+    # Combine => sigma(omega) = Re + i*Im on the common grid
+    omega = resigma_arr[:, 0]
+    if len(omega) and np.max(np.abs(omega - imsigma_arr[:, 0])) > 1e-12:
+        raise DMFTError("Mismatch in omega for resigma/imsigma.")
+    sig = resigma_arr[:, 1] + 1j*imsigma_arr[:, 1]
+
+    # Step C: G_loc = htDOS(omega - sigma), Hilbert transform of the semicircular
+    # DOS (vectorized over the whole grid). Im(z) <= 0 is replaced by EPS > 0,
+    # so the retarded branch (sign +1 in front of the square root) always applies.
+    EPS = 1e-20
+    z = omega - sig
+    z.imag[~(z.imag > 0)] = EPS
+    G_loc = 2.0*(z - 1j*np.sqrt(1.0 - z*z))
 
     # write G_loc.dat
     try:
-        with open("G_loc.dat", "w") as f:
-            for (om, val) in G_loc:
-                f.write(f"{om} {val.real} {val.imag}\n")
+        np.savetxt("G_loc.dat", np.column_stack((omega, G_loc.real, G_loc.imag)), fmt='%.17g')
     except Exception as e:
         raise DMFTError(f"Error writing G_loc.dat: {e}")
 
     # A(omega)
-    imaw_data = []
-    reaw_data = []
-    for (om, val) in G_loc:
-        A_im = -1.0/math.pi * val.imag
-        A_re = -1.0/math.pi * val.real
-        imaw_data.append((om, A_im))
-        reaw_data.append((om, A_re))
+    imaw = -1.0/math.pi * G_loc.imag
+    reaw = -1.0/math.pi * G_loc.real
 
-    _write_two_column_data("imaw.dat", imaw_data)
-    _write_two_column_data("reaw.dat", reaw_data)
+    _write_two_column_data("imaw.dat", np.column_stack((omega, imaw)))
+    _write_two_column_data("reaw.dat", np.column_stack((omega, reaw)))
 
     # Step D: new Delta.dat => Im[1/G_loc + sigma]
-    g0inv = []
-    for (g_loc_tuple, sig_tuple) in zip(G_loc, sigma):
-        om, G_loc_val = g_loc_tuple
-        _, sig_val    = sig_tuple
-        if abs(G_loc_val) < 1e-30:
-            val = 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g0inv = np.where(np.abs(G_loc) < 1e-30, 0.0, 1.0/G_loc + sig)
+    delta_im = g0inv.imag
+
+    # Residual and optional mixing against the input Delta of this iteration:
+    # prev_delta as kept in memory by the caller, or (first iteration only)
+    # Delta.dat.prev parsed from text. The residual max|Delta_out - Delta_in|
+    # is taken before mixing: the mixed Delta only differs from the input by
+    # alpha*residual.
+    residual = None
+    old_arr = prev_delta
+    if old_arr is None and os.path.exists("Delta.dat.prev"):
+        old_arr = _read_two_column_data("Delta.dat.prev")
+    if old_arr is not None:
+        if old_arr.shape == (len(omega), 2) and np.allclose(old_arr[:, 0], omega, rtol=0.0, atol=1e-12):
+            residual = float(np.max(np.abs(delta_im - old_arr[:, 1]))) if len(omega) else 0.0
+            if mixer is not None:
+                try:
+                    delta_im = np.asarray(mixer(old_arr[:, 1], delta_im), dtype=np.float64)
+                except Exception as e:
+                    raise DMFTError(f"Error during mixing of Delta: {e}")
+                logger.debug("Mixed new Delta with the input Delta.")
         else:
-            val = 1.0/G_loc_val + sig_val
-        g0inv.append((om, val))
-
-    Delta_data = []
-    for (om, val) in g0inv:
-        Delta_data.append((om, val.imag))
+            logger.info("Frequency grid of the input Delta differs from the new Delta; "
+                        "skipping mixing and residual.")
 
-    _write_two_column_data("Delta.dat", Delta_data)
+    # Write to a new file and rename it over Delta.dat: writing in place would
+    # also overwrite Delta.dat.prev when that is a hard link to it
+    delta_arr = np.column_stack((omega, delta_im))
+    _write_two_column_data("Delta.dat.tmp", delta_arr)
+    try:
+        os.replace("Delta.dat.tmp", "Delta.dat")
+    except Exception as e:
+        raise DMFTError(f"Error writing Delta.dat: {e}")
 
     # Step E: call kk if available
     if shutil.which("kk"):
-        cmd = "kk Delta.dat Delta-re.dat"
+        cmd = ["kk", "Delta.dat", "Delta-re.dat"]  # argument list => no /bin/sh in between
         try:
-            subprocess.check_call(cmd, shell=True)
+            subprocess.check_call(cmd)
         except subprocess.CalledProcessError as e:
-            raise DMFTError(f"Command '{cmd}' failed: {e}")
-
-    # Step F: Bisection for mu with real-time plotting
-    imaw_data.sort(key=lambda x: x[0])
-    mu_found, f_found, converged, iteration_data = find_mu_for_occupation(
-        A_data=imaw_data,
-        n_target=n_target,
-        T=T,
-        eps_n=eps_n,
-        mu_min=mu_min,
-        mu_max=mu_max,
-        max_iter=max_mu_iter,
-        iteration_label=str(iteration_index) if iteration_index is not None else None
-    )
+            raise DMFTError(f"Command '{' '.join(cmd)}' failed: {e}")
+
+    # Step F: Brent root search for mu (live plot only if requested)
+    order = np.argsort(omega, kind="stable")
+    omega_arr, A_arr = omega[order], imaw[order]
+
+    def search(lo, hi):
+        return find_mu_for_occupation(
+            omega=omega_arr,
+            A=A_arr,
+            n_target=n_target,
+            T=T,
+            eps_n=eps_n,
+            mu_min=lo,
+            mu_max=hi,
+            max_iter=max_mu_iter,
+            iteration_label=str(iteration_index) if iteration_index is not None else None,
+            live_plot=live_plot
+        )
+
+    converged = False
+    if mu_bracket is not None:
+        logger.debug(f"Searching mu first in [{mu_bracket[0]:.6f}, {mu_bracket[1]:.6f}]")
+        mu_found, f_found, converged, iteration_data = search(*mu_bracket)
+        if not converged:
+            logger.info(f"No mu found in [{mu_bracket[0]:.6f}, {mu_bracket[1]:.6f}]; "
+                        f"searching [{mu_min}, {mu_max}] instead.")
+    if not converged:
+        mu_found, f_found, converged, iteration_data = search(mu_min, mu_max)
 
     final_occ = f_found + n_target
-    logger.info(f"Bisection result:\n"
+    logger.info(f"Root search result for mu:\n"
                 f"   mu = {mu_found:.6f}\n"
                 f"   occupation = {final_occ:.6f}\n"
                 f"   F = {f_found:.6e}\n"
                 f"   converged? {converged} (|F| < {eps_n})")
 
-    logger.debug("execute_dmft() completed successfully.")
\ No newline at end of file
+    logger.debug("execute_dmft() completed successfully.")
+    return mu_found, residual, delta_arr
\ No newline at end of file
@@ -3,9 +3,11 @@
 import subprocess
 import sys
 import os
-import logging
+import hashlib
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+
+from .parameter_parser import parse_param_loop
+from ._logging import setup_module_logger
 
 class ODESolverError(Exception):
     """Custom exception for ODE Solver errors."""
@@ -18,33 +20,13 @@ def setup_logging():
     Returns:
         logging.Logger: Configured logger instance.
     """
-    logger = logging.getLogger('ODESolver')
-    logger.setLevel(logging.DEBUG)  # Set to DEBUG to capture all messages
-
-    # Prevent adding multiple handlers if this function is called multiple times
-    if not logger.handlers:
-        # Rotating File Handler: Keeps the log file size manageable
-        fh = RotatingFileHandler('odesolv.log', maxBytes=5*1024*1024, backupCount=5)
-        fh.setLevel(logging.DEBUG)  # Record DEBUG+ in the file
-        fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(fh_formatter)
-        logger.addHandler(fh)
-
-        # Console Handler: We only show INFO-level logs (i.e., errors in our new scheme)
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)  # Show INFO+ on console
-        ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        ch.setFormatter(ch_formatter)
-        logger.addHandler(ch)
-
-        # Prevent log messages from propagating to the root logger
-        logger.propagate = False
-
-    return logger
+    # Rotating file (DEBUG+) keeps odesolv.log manageable; INFO+ on the console
+    return setup_module_logger('ODESolver', 'odesolv.log',
+                               max_bytes=5*1024*1024, backup_count=5)
 
 def run_and_log(command, logfile, logger):
     """
-    Executes a shell command and writes its output to a logfile and console.
+    Executes a shell command and writes its output (stdout and stderr) to a logfile.
 
     Args:
         command (str): The command to execute (e.g., "adapt P param.loop").
@@ -65,25 +47,16 @@ def run_and_log(command, logfile, logger):
         env["DYLD_LIBRARY_PATH"] = f"{boost_lib_path}:{existing_dyld}"
         logger.debug(f"DYLD_LIBRARY_PATH set to: {env['DYLD_LIBRARY_PATH']}")
 
-        # Execute the command
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            env=env
-        )
-
-        # Stream the output to both the logfile and console
+        # Execute the command; its output goes straight into the logfile
+        # (no per-line handling in Python)
         with open(logfile, 'a') as f:
-            for line in process.stdout:
-                f.write(line)
-                # Also log routine output at DEBUG
-                logger.debug(line.strip())
-
-        # Wait for the command to complete
-        process.wait()
+            process = subprocess.run(
+                command,
+                shell=True,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                env=env
+            )
 
         # Check for errors
         if process.returncode != 0:
@@ -103,9 +76,37 @@ def run_and_log(command, logfile, logger):
         logger.info(error_msg)
         raise ODESolverError(error_msg)
 
+# Files written by 'adapt P' / 'adapt N' and the stamp recording their inputs
+ODE_OUTPUT_FILES = ("FSOL.dat", "GSOL.dat", "FSOLNEG.dat", "GSOLNEG.dat")
+ODE_STAMP_FILE = "odesolv.stamp"
+
+def _input_signature(paths):
+    """
+    Returns a SHA-256 digest over the names and contents of the given files
+    (missing files contribute only their name).
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode())
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+def _read_stamp():
+    """Returns the input signature of the last successful run, or None."""
+    try:
+        with open(ODE_STAMP_FILE, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
 def execute_ode_commands():
     """
     Executes predefined ODE solver commands and logs their outputs.
+    The commands are skipped if param.loop and the hybridization file it names
+    (dos=, default Delta.dat) are unchanged since the last successful run
+    (see ODE_STAMP_FILE) and the outputs still exist.
 
     Raises:
         ODESolverError: If any command fails to execute properly.
@@ -118,10 +119,36 @@ def execute_ode_commands():
         logger.info(error_msg)
         raise ODESolverError(error_msg)
 
+    # The ODE solution depends only on param.loop and the hybridization function
+    # ('dos' in param.loop). If both are unchanged since the last successful
+    # run, reuse its output.
+    try:
+        dos_filename = parse_param_loop(param_filename).get("dos", "Delta.dat")
+    except RuntimeError as e:
+        error_msg = f"Error reading '{param_filename}': {e}"
+        logger.info(error_msg)
+        raise ODESolverError(error_msg)
+    signature = _input_signature([param_filename, dos_filename])
+    if (_read_stamp() == signature
+            and all(os.path.isfile(fn) for fn in ODE_OUTPUT_FILES)):
+        logger.debug("ODE solver inputs unchanged since last run; skipping 'adapt'.")
+        return
+
+    # Invalidate the stamp until the commands below have succeeded
+    if os.path.exists(ODE_STAMP_FILE):
+        os.remove(ODE_STAMP_FILE)
+
     commands = [
         (f"adapt P {param_filename}", "solverlog"),
         (f"adapt N {param_filename}", "solverlogneg")
     ]
 
     for cmd, log in commands:
-        run_and_log(cmd, log, logger)
\ No newline at end of file
+        run_and_log(cmd, log, logger)
+
+    try:
+        with open(ODE_STAMP_FILE, 'w') as f:
+            f.write(signature + "\n")
+    except OSError as e:
+        # Not fatal: the next call simply runs the solver again
+        logger.debug(f"Could not write '{ODE_STAMP_FILE}': {e}")
\ No newline at end of file
@@ -3,6 +3,7 @@
 import os
 import re
 import logging
+from functools import lru_cache
 
 # Initialize a logger for the parameter_parser module
 logger = logging.getLogger('parameter_parser')
@@ -11,6 +12,23 @@ class SimulationError(Exception):
     """Custom exception for simulation errors."""
     pass
 
+# Section headers in param.loop, e.g. [param] (compiled once at import)
+_SECTION_RE = re.compile(r'\[(.+)\]')
+
+# Keys recognized per section of param.loop (frozensets => O(1) membership).
+# The [param] keys include eps_n, mu_min, mu_max, max_mu_iter, etc.
+_SECTION_PARAMS = {
+    "extra": frozenset({"U", "epsilon"}),
+    "param": frozenset({
+        "symtype", "Lambda", "Tmin", "keepmin", "keepenergy", "keep",
+        "band", "dos", "bandrescale", "discretization", "ops", "specd", "fdm",
+        "broaden_max", "broaden_ratio", "broaden_min", "broaden_alpha", "broaden_gamma",
+        "bins", "broaden", "savebins", "T", "model", "Nz", "mixing_method",
+        "mixing_parameter", "n_target", "N_matsubara",
+        "eps_n", "mu_min", "mu_max", "max_mu_iter"
+    })
+}
+
 def parse_param_loop(filename):
     """
     Parses the param.loop file and extracts relevant parameters for DMFT and Delta generation.
@@ -28,19 +46,6 @@ def parse_param_loop(filename):
     params = {}
     current_section = None
 
-    # Extend the recognized keys in the [param] section to include eps_n, mu_min, mu_max, max_mu_iter, etc.
-    section_params = {
-        "extra": ["U", "epsilon"],
-        "param": [
-            "symtype", "Lambda", "Tmin", "keepmin", "keepenergy", "keep",
-            "band", "dos", "bandrescale", "discretization", "ops", "specd", "fdm",
-            "broaden_max", "broaden_ratio", "broaden_min", "broaden_alpha", "broaden_gamma",
-            "bins", "broaden", "savebins", "T", "model", "Nz", "mixing_method",
-            "mixing_parameter", "n_target", "N_matsubara",
-            "eps_n", "mu_min", "mu_max", "max_mu_iter"
-        ]
-    }
-
     try:
         with open(filename, 'r') as f:
             for line in f:
@@ -52,14 +57,14 @@ def parse_param_loop(filename):
                     continue
 
                 # Check for section headers, e.g., [section]
-                section_match = re.match(r'\[(.+)\]', line)
+                section_match = _SECTION_RE.match(line)
                 if section_match:
                     current_section = section_match.group(1).strip().lower()
                     continue
 
                 # Parse key=value pairs
-                if '=' in line:
-                    key, value = line.split('=', 1)
+                key, sep, value = line.partition('=')
+                if sep:
                     key = key.strip()
                     value = value.strip()
 
@@ -69,11 +74,11 @@ def parse_param_loop(filename):
 
                     # If we are in a recognized section, store the parameter
                     if (current_section
-                        and key in section_params.get(current_section, [])):
+                        and key in _SECTION_PARAMS.get(current_section, ())):
                         params[key] = value
                     # If not in a recognized section but the key is in [param] by default
                     elif (not current_section
-                          and key in section_params.get("param", [])):
+                          and key in _SECTION_PARAMS["param"]):
                         params[key] = value
 
     except FileNotFoundError:
@@ -85,6 +90,15 @@ def parse_param_loop(filename):
 
     return params
 
+@lru_cache(maxsize=8)
+def _cached_parse_param_loop(filename, mtime_ns, size):
+    """
+    parse_param_loop(filename), memoized on the file's (mtime_ns, size):
+    a modified param.loop gets a new key and is parsed again.
+    The cached dict is shared => callers must not modify it.
+    """
+    return parse_param_loop(filename)
+
 def get_parameters(param_loop_path="param.loop"):
     """
     Retrieves parameters from param.loop if present, else uses default values.
@@ -144,7 +158,9 @@ def get_parameters(param_loop_path="param.loop"):
     # --------------------------
     if os.path.isfile(param_loop_path):
         try:
-            file_params = parse_param_loop(param_loop_path)
+            stat = os.stat(param_loop_path)
+            file_params = dict(_cached_parse_param_loop(
+                os.path.abspath(param_loop_path), stat.st_mtime_ns, stat.st_size))
             # Merge parsed parameters with defaults (parsed parameters take precedence)
             params = {**default_params, **file_params}
             logger.debug(f"Parameters parsed from '{param_loop_path}': {file_params}")
@@ -8,40 +8,58 @@ Only INFO-level messages (errors) are displayed on the console.
 
 import os
 import sys
+import shlex
 import subprocess
-import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from ._logging import setup_module_logger
 
 class RealPartsError(Exception):
     """Custom exception for realparts.py errors."""
     pass
 
-# Configure the logger for this module
-logger = logging.getLogger(__name__)
+# Configure the logger for this module: DEBUG+ in 'realparts.log', INFO+ on the console
+logger = setup_module_logger(__name__, 'realparts.log')
+
+def _run_kk(prefix, kkexe="kk"):
+    """
+    Runs 'kk' on '<prefix>.dat' (e.g. 'c-imF.dat'), producing the real part
+    (e.g. 'c-reF.dat').
+
+    Raises:
+      RealPartsError: If the input file is missing, 'kk' fails, or the output file is not created.
+    """
+    in_file = f"{prefix}.dat"            # e.g. "c-imF.dat"
+    out_file = in_file.replace("im", "re")  # e.g. "c-reF.dat"
 
-# Set the logger's level to DEBUG to capture all messages
-logger.setLevel(logging.DEBUG)
+    # Check existence of input
+    if not os.path.isfile(in_file):
+        msg = f"Input file '{in_file}' not found."
+        logger.info(msg)  # Show at console
+        raise RealPartsError(msg)
 
-if not logger.handlers:
-    # File Handler: Record DEBUG and above in 'realparts.log'
-    fh = logging.FileHandler('realparts.log')
-    fh.setLevel(logging.DEBUG)
-    fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    fh.setFormatter(fh_formatter)
-    logger.addHandler(fh)
+    cmd = [kkexe, in_file, out_file]  # argument list => no /bin/sh in between
+    logger.debug(f"Executing command: {shlex.join(cmd)}")
 
-    # Console Handler: Display only INFO and above in the console
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(ch_formatter)
-    logger.addHandler(ch)
+    try:
+        subprocess.check_call(cmd)
+    except subprocess.CalledProcessError as e:
+        msg = f"Command '{shlex.join(cmd)}' failed: {e}"
+        logger.info(msg)
+        raise RealPartsError(msg)
 
-    # Disable propagation to prevent duplication
-    logger.propagate = False
+    # Verify output
+    if not os.path.isfile(out_file):
+        msg = f"Output file '{out_file}' not found after running '{shlex.join(cmd)}'."
+        logger.info(msg)
+        raise RealPartsError(msg)
+
+    logger.debug(f"Successfully created '{out_file}' from '{in_file}'.")
 
 def execute_realparts():
     """
     Calls 'kk' on each of 'c-imF.dat' and 'c-imG.dat', generating 'c-reF.dat' and 'c-reG.dat'.
+    The two 'kk' runs are independent and are executed concurrently.
     Assumes:
       - 'kk' is installed and in system PATH
       - 'c-imF.dat' and 'c-imG.dat' are in current directory
@@ -53,34 +71,18 @@ def execute_realparts():
 
     # We'll look for 'c-imF.dat' and 'c-imG.dat' in current dir
     file_prefixes = ["c-imF", "c-imG"]
-    kkexe = "kk"  # Command to run
-
-    for prefix in file_prefixes:
-        in_file = f"{prefix}.dat"            # e.g. "c-imF.dat"
-        out_file = in_file.replace("im", "re")  # e.g. "c-reF.dat"
-
-        # Check existence of input
-        if not os.path.isfile(in_file):
-            msg = f"Input file '{in_file}' not found."
-            logger.info(msg)  # Show at console
-            raise RealPartsError(msg)
-
-        cmd = f"{kkexe} {in_file} {out_file}"
-        logger.debug(f"Executing command: {cmd}")
 
+    # Wait for all runs, then report the first failure (if any)
+    with ThreadPoolExecutor(max_workers=len(file_prefixes)) as executor:
+        futures = [executor.submit(_run_kk, prefix) for prefix in file_prefixes]
+    for future in futures:
         try:
-            subprocess.check_call(cmd, shell=True)
-        except subprocess.CalledProcessError as e:
-            msg = f"Command '{cmd}' failed: {e}"
+            future.result()
+        except RealPartsError:
+            raise
+        except Exception as e:
+            msg = f"Unexpected error while running 'kk': {e}"
             logger.info(msg)
             raise RealPartsError(msg)
 
-        # Verify output
-        if not os.path.isfile(out_file):
-            msg = f"Output file '{out_file}' not found after running '{cmd}'."
-            logger.info(msg)
-            raise RealPartsError(msg)
-
-        logger.debug(f"Successfully created '{out_file}' from '{in_file}'.")
-
-    logger.debug("execute_realparts() completed with no errors.")
\ No newline at end of file
+    logger.debug("execute_realparts() completed with no errors.")
@@ -11,7 +11,7 @@ imag/real Green's function data and Delta data. It performs:
    - Delta.dat (imag part of Delta in column 2)
    - Delta-re.dat (real part of Delta in column 2)
 
-2) For each frequency omega[i]:
+2) For each frequency omega[i] (as whole-array NumPy operations):
    - G = reG[i] + i*imG[i]
    - F = reF[i] + i*imF[i]
    - sigma = F / G
@@ -34,55 +34,40 @@ Usage (called from main.py, not standalone):
 """
 
 import math
-import cmath
 import os
 import sys
-import logging
+import numpy as np
+
+from ._logging import setup_module_logger, level_from_env
 
 class SigmaTrickError(Exception):
     """Custom exception for errors in sigmatrick.py."""
     pass
 
-# Configure logger for this module
-logger = logging.getLogger(__name__)
-# Set the logger's level to DEBUG to capture all messages
-logger.setLevel(logging.DEBUG)
-
-if not logger.handlers:
-    # File handler: capture all logs at DEBUG in 'sigmatrick.log'
-    fh = logging.FileHandler('sigmatrick.log')
-    fh.setLevel(logging.DEBUG)  # Capture DEBUG and above in the file
-    fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    fh.setFormatter(fh_formatter)
-    logger.addHandler(fh)
-
-    # Console handler: only show INFO+ (i.e., error messages) on console
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)  # Capture INFO and above on console
-    ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(ch_formatter)
-    logger.addHandler(ch)
-
-    # Disable propagation to prevent duplication
-    logger.propagate = False
-
-def _readcol(filename, column):
+# Configure logger for this module: INFO+ on the console and in 'sigmatrick.log'.
+# DEBUG records go to the file only with SIGMATRICK_LOG_LEVEL=DEBUG; otherwise
+# logger.debug calls return without formatting anything.
+logger = setup_module_logger(__name__, 'sigmatrick.log',
+                             file_level=level_from_env("SIGMATRICK_LOG_LEVEL"))
+
+# -1/pi, the factor between Im(gf) and A(omega)
+_NEG_INV_PI = -1.0 / math.pi
+
+# Number of flagged indices listed in a warning
+_MAX_REPORTED = 10
+
+# Buffer size of the output files
+_WRITE_BUFFER_SIZE = 1 << 20
+
+def _read_data(filename):
     """
-    Reads the specified 1-based column from a text file that typically has two columns.
-    Returns a list of floats.
+    Reads the first two columns (omega, value) of a text file in one pass.
+    Returns a numpy array of shape (N, 2).
     Logs routine steps at DEBUG, errors at INFO.
     """
-    logger.debug(f"Reading column {column} from file '{filename}'...")
-    values = []
+    logger.debug("Reading file '%s'...", filename)
     try:
-        with open(filename, 'r') as f:
-            for line_num, line in enumerate(f, start=1):
-                stripped = line.strip()
-                if not stripped:
-                    continue
-                parts = stripped.split()
-                val = float(parts[column - 1])
-                values.append(val)
+        values = np.loadtxt(filename, usecols=(0, 1), ndmin=2, dtype=np.float64)
     except FileNotFoundError:
         msg = f"Input file '{filename}' not found."
         logger.info(msg)  # Show error on console
@@ -92,9 +77,63 @@ def _readcol(filename, column):
         logger.info(msg)
         raise SigmaTrickError(msg)
 
-    logger.debug(f"Successfully read {len(values)} values from '{filename}'.")
+    logger.debug("Successfully read %d rows from '%s'.", len(values), filename)
     return values
 
+def _sigma_kernel(omega, reG, imG, reF, imF, redelta, imdelta):
+    """
+    Whole-array form of the per-frequency computation:
+      sigma = F / G            (sigma = 0 where |G| < 1e-30)
+      gf    = 1 / (omega + delta - sigma)
+      aw    = -1/pi * Im(gf)   (aw = 0 where |omega + delta - sigma| < 1e-30)
+    The complex divisions are expanded into real arithmetic,
+      F / G = (F * conj(G)) / |G|^2,   Im(1/d) = -Im(d) / |d|^2,
+    and the thresholds are tested on |.|^2 (no square roots). All steps run
+    in place in a few float work arrays.
+
+    Returns:
+        tuple: (sigma_re, sigma_im, aw, g_zero, keep); g_zero flags G ~ 0 and
+        keep is False where the denominator is ~ 0 (points to be skipped).
+    """
+    n = len(omega)
+    tmp = np.empty(n)
+
+    # |G|^2, handle G ~ 0 (|G| < 1e-30  <=>  |G|^2 < 1e-60)
+    mag_g = np.multiply(reG, reG)
+    np.multiply(imG, imG, out=tmp)
+    mag_g += tmp
+    g_zero = mag_g < 1e-60
+    mag_g[g_zero] = 1.0  # sigma = 0 there: numerators are zeroed below
+
+    # sigma = F * conj(G) / |G|^2
+    sigma_re = np.multiply(reF, reG)
+    np.multiply(imF, imG, out=tmp)
+    sigma_re += tmp
+    sigma_re /= mag_g
+    sigma_im = np.multiply(imF, reG)
+    np.multiply(reF, imG, out=tmp)
+    sigma_im -= tmp
+    sigma_im /= mag_g
+    sigma_re[g_zero] = 0.0
+    sigma_im[g_zero] = 0.0
+
+    # d = omega + delta - sigma, handle near-zero denominator
+    d_re = np.add(omega, redelta)
+    d_re -= sigma_re
+    d_im = np.subtract(imdelta, sigma_im)
+    mag_d = np.multiply(d_re, d_re)
+    np.multiply(d_im, d_im, out=tmp)
+    mag_d += tmp
+    keep = mag_d >= 1e-60
+    mag_d[~keep] = 1.0
+
+    # aw = -1/pi * Im(1/d) = -1/pi * (-Im(d) / |d|^2)
+    gf_im = np.negative(d_im, out=d_im)
+    gf_im /= mag_d
+    aw = np.multiply(gf_im, _NEG_INV_PI, out=gf_im)
+    aw[~keep] = 0.0
+    return sigma_re, sigma_im, aw, g_zero, keep
+
 def execute_sigmatrick():
     """
     Main function to compute self-energy trick. Writes c-self.dat, imsigma.dat, resigma.dat.
@@ -104,32 +143,24 @@ def execute_sigmatrick():
     logger.debug("Starting execute_sigmatrick().")
 
     try:
-        # 1) Read input columns
-        omega     = _readcol("c-imG.dat", 1)
-        imG       = _readcol("c-imG.dat", 2)
-        reG       = _readcol("c-reG.dat", 2)
-        imF       = _readcol("c-imF.dat", 2)
-        reF       = _readcol("c-reF.dat", 2)
-        imdelta   = _readcol("Delta.dat",    2)
-        redelta   = _readcol("Delta-re.dat", 2)
+        # 1) Read input columns (each file once; c-imG.dat gives omega and imG)
+        img_data  = _read_data("c-imG.dat")
+        omega     = img_data[:, 0]
+        imG       = img_data[:, 1]
+        reG       = _read_data("c-reG.dat")[:, 1]
+        imF       = _read_data("c-imF.dat")[:, 1]
+        reF       = _read_data("c-reF.dat")[:, 1]
+        imdelta   = _read_data("Delta.dat")[:, 1]
+        redelta   = _read_data("Delta-re.dat")[:, 1]
     except SigmaTrickError as e:
         # Already logged at INFO
         raise e
 
-    # 2) Prepare output files
+    # 2) Output files
     selffn  = "c-self.dat"
     imsigma = "imsigma.dat"
     resigma = "resigma.dat"
-    logger.debug(f"Output files: {selffn}, {imsigma}, {resigma}")
-
-    try:
-        f_self = open(selffn,  "w")
-        f_im   = open(imsigma, "w")
-        f_re   = open(resigma, "w")
-    except Exception as e:
-        msg = f"Error opening output files: {e}"
-        logger.info(msg)
-        raise SigmaTrickError(msg)
+    logger.debug("Output files: %s, %s, %s", selffn, imsigma, resigma)
 
     # 3) Check data lengths
     length = len(omega)
@@ -138,37 +169,30 @@ def execute_sigmatrick():
         logger.info(msg)
         raise SigmaTrickError(msg)
 
-    logger.debug(f"Processing {length} frequency points.")
-    for i in range(length):
-        o     = omega[i]
-        G     = complex(reG[i], imG[i])
-        F     = complex(reF[i], imF[i])
-        delta = complex(redelta[i], imdelta[i])
-
-        # sigma = F / G, handle G ~ 0
-        if abs(G) < 1e-30:
-            msg = f"Warning: G ~ 0 at index {i}, omega={o}. Using sigma=0."
-            logger.info(msg)
-            sigma = 0+0j
-        else:
-            sigma = F / G
-
-        # gf = 1/(omega + delta - sigma), handle near-zero denominator
-        denom = complex(o, 0) + delta - sigma
-        if abs(denom) < 1e-30:
-            msg = f"Warning: denominator near zero at index {i}, omega={o}. Skipping."
-            logger.info(msg)
-            continue
-
-        gf = 1.0 / denom
-        aw = -1.0 / math.pi * gf.imag
-
-        f_self.write(f"{o} {aw}\n")
-        f_im.write(f"{o} {sigma.imag}\n")
-        f_re.write(f"{o} {sigma.real}\n")
-
-    f_self.close()
-    f_im.close()
-    f_re.close()
+    logger.debug("Processing %d frequency points.", length)
+
+    sigma_re, sigma_im, aw, g_zero, keep = _sigma_kernel(omega, reG, imG, reF, imF, redelta, imdelta)
+
+    # One batched warning per case (at most _MAX_REPORTED indices listed)
+    bad_g = np.flatnonzero(g_zero)
+    if bad_g.size:
+        logger.info("Warning: G ~ 0 at %d points (indices %s, omega=%s). Using sigma=0.",
+                    bad_g.size, bad_g[:_MAX_REPORTED].tolist(), omega[bad_g[:_MAX_REPORTED]].tolist())
+    bad_d = np.flatnonzero(~keep)
+    if bad_d.size:
+        logger.info("Warning: denominator near zero at %d points (indices %s, omega=%s). Skipping.",
+                    bad_d.size, bad_d[:_MAX_REPORTED].tolist(), omega[bad_d[:_MAX_REPORTED]].tolist())
+
+    # 4) Write each output with a single call (points with denom ~ 0 are skipped)
+    omega_kept = omega[keep]
+    try:
+        for filename, values in ((selffn, aw), (imsigma, sigma_im), (resigma, sigma_re)):
+            # Binary mode with a 1 MiB buffer: ASCII output, few write syscalls
+            with open(filename, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+                np.savetxt(f, np.column_stack((omega_kept, values[keep])), fmt="%.17g %.17g")
+    except Exception as e:
+        msg = f"Error writing output files: {e}"
+        logger.info(msg)
+        raise SigmaTrickError(msg)
 
     logger.debug("execute_sigmatrick() completed with no errors, outputs written.")
\ No newline at end of file
@@ -2,69 +2,39 @@
 
 import subprocess
 import os
+import functools
 import sys
 import logging
 import time
 from shutil import which
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .parameter_parser import get_parameters  # Ensure this module exists and is correctly implemented
+from ._logging import setup_module_logger, level_from_env
 import argparse
 
 class SimulationError(Exception):
     """Custom exception for simulation errors."""
     pass
 
-# Configure logging for simulation.py
-logger = logging.getLogger(__name__)
+# Configure logging for simulation.py: INFO+ on the console and in 'simulation.log'.
+# DEBUG records (commands, attempts, directory listings) go to the file only
+# with SIMULATION_LOG_LEVEL=DEBUG, as for AVERAGE_LOG_LEVEL in average.py.
+logger = setup_module_logger(__name__, 'simulation.log', file_level=level_from_env("SIMULATION_LOG_LEVEL"))
 
-# We'll set the base logger level to DEBUG so everything is recorded
-logger.setLevel(logging.DEBUG)
+# Project root: the z-step directories 1/, 2/, ... and Delta.dat, model.m live here
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
-# Create handlers if they don't exist to avoid duplicate logs
-if not logger.handlers:
-    # File handler: capture all logs at DEBUG level into 'simulation.log'
-    fh = logging.FileHandler('simulation.log')
-    fh.setLevel(logging.DEBUG)
-    fh_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    fh.setFormatter(fh_formatter)
-    logger.addHandler(fh)
+# Directories already created by _ensure_dir (skips repeated makedirs calls)
+_CREATED_DIRS = set()
 
-    # Console handler: show only INFO and above on the console
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    ch_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    ch.setFormatter(ch_formatter)
-    logger.addHandler(ch)
+def _ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), done once per path."""
+    if path not in _CREATED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _CREATED_DIRS.add(path)
 
-    # **Disable propagation to prevent duplication**
-    logger.propagate = False
-
-def verify_command(command_name):
-    """
-    Verifies if a command exists in the system's PATH.
-    """
-    # We'll do these checks at DEBUG, so they don't appear in console under normal circumstances
-    logger.debug(f"Verifying command: {command_name}")
-    if which(command_name) is None:
-        # If not found, that is an error => show at INFO so user sees it
-        logger.info(f"Command not found: {command_name}")
-        raise SimulationError(f"Command not found: {command_name}")
-    else:
-        logger.debug(f"Command '{command_name}' found.")
-
-def generate_param(z, output_dir, param_filename='param'):
-    """
-    Generates the 'param' configuration file for a specific z-step.
-    """
-    try:
-        # We'll log routine details at DEBUG
-        logger.debug(f"Generating param file for z={z} in {output_dir}")
-
-        # Absolute paths for dos and model
-        dos_abs_path = os.path.abspath(os.path.join(output_dir, '..', 'Delta.dat'))
-        model_abs_path = os.path.abspath(os.path.join(output_dir, '..', 'model.m'))
-
-        # The param file content
-        param_content = f"""[extra]
+# Template of the 'param' file of a z-step (placeholders: dos, model, z)
+_PARAM_TEMPLATE = """[extra]
 U=2
 epsilon=-1
 
@@ -77,12 +47,12 @@ keepenergy=8.0
 keep=10000
 
 band=asymode
-dos={dos_abs_path}
+dos={dos}
 bandrescale=10
 
 discretization=Z
 
-model={model_abs_path}
+model={model}
 
 ops=A_d self_d n_d
 specd=A_d-A_d self_d-A_d
@@ -103,94 +73,140 @@ T=1e-8
 z={z}
 """
 
-        os.makedirs(output_dir, exist_ok=True)
+@functools.lru_cache(maxsize=None)
+def _which_cached(command_name):
+    """shutil.which, looked up once per command (PATH does not change during a run)."""
+    return which(command_name)
+
+@functools.lru_cache(maxsize=None)
+def _input_paths(output_dir):
+    """Absolute paths of Delta.dat and model.m in the parent of output_dir."""
+    dos_abs_path = os.path.abspath(os.path.join(output_dir, '..', 'Delta.dat'))
+    model_abs_path = os.path.abspath(os.path.join(output_dir, '..', 'model.m'))
+    return dos_abs_path, model_abs_path
+
+def verify_command(command_name):
+    """
+    Verifies if a command exists in the system's PATH.
+    """
+    # We'll do these checks at DEBUG, so they don't appear in console under normal circumstances
+    logger.debug("Verifying command: %s", command_name)
+    if _which_cached(command_name) is None:
+        # If not found, that is an error => show at INFO so user sees it
+        logger.info(f"Command not found: {command_name}")
+        raise SimulationError(f"Command not found: {command_name}")
+    else:
+        logger.debug("Command '%s' found.", command_name)
+
+def generate_param(z, output_dir, param_filename='param'):
+    """
+    Generates the 'param' configuration file for a specific z-step.
+    """
+    try:
+        # We'll log routine details at DEBUG
+        logger.debug("Generating param file for z=%s in %s", z, output_dir)
+
+        # Absolute paths for dos and model
+        dos_abs_path, model_abs_path = _input_paths(output_dir)
+
+        # The param file content
+        param_content = _PARAM_TEMPLATE.format(dos=dos_abs_path, model=model_abs_path, z=z)
+
+        _ensure_dir(output_dir)
         param_path = os.path.join(output_dir, param_filename)
 
         with open(param_path, 'w') as param_file:
             param_file.write(param_content)
 
         # We'll keep this message at DEBUG, so it doesn't clutter the console
-        logger.debug(f"Generated param file at: {param_path}")
+        logger.debug("Generated param file at: %s", param_path)
         return param_path
     except Exception as e:
         # If an error occurs, we show it at INFO so user sees it in console
         logger.info(f"Error generating param file for z={z}: {e}")
         raise SimulationError(f"Error generating param file for z={z}: {e}")
 
-def execute_command(command, description, cwd, verbose=False, retries=3, delay=5, use_mpi=False):
+def _env_number(name, default, cast=int):
+    """
+    Value of the environment variable 'name' converted with cast, or default
+    if it is unset or invalid (logged).
+    """
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        logger.info(f"Invalid {name}='{os.environ[name]}'; using {default}.")
+        return default
+
+# Return codes of commands that cannot run at all (not executable / not found):
+# retrying them is pointless
+_PERMANENT_RETURN_CODES = (126, 127)
+
+def execute_command(command, description, cwd, verbose=False, retries=None, delay=None, use_mpi=False):
     """
     Executes a shell command with optional MPI, using a retry mechanism.
+
+    retries (default: DYNAMEANX_RETRIES or 3, at least 1) attempts are made;
+    before attempt k+1 we wait delay * 2**(k-1) seconds (delay default:
+    DYNAMEANX_RETRY_DELAY or 5, at least 0). Return codes 126/127 fail
+    immediately.
     """
+    if retries is None:
+        retries = _env_number("DYNAMEANX_RETRIES", 3)
+    if delay is None:
+        delay = _env_number("DYNAMEANX_RETRY_DELAY", 5.0, cast=float)
+    # At least one attempt: with retries < 1 the command would never run
+    retries = max(1, retries)
+    delay = max(0.0, delay)
     if use_mpi:
         mpi_command = ['/opt/homebrew/bin/mpirun', '-np', '4'] + command
     else:
         mpi_command = command
 
     full_command = ' '.join(mpi_command)
+    # Output is not buffered in Python: with verbose it goes to '<cwd>/stdout.log'
+    # (stderr included), otherwise it is discarded and only stderr is kept
+    # to report failures.
+    output_log = os.path.join(cwd, 'stdout.log')
     for attempt in range(1, retries + 1):
-        logger.debug(f"Attempt {attempt}: {description} => {full_command}")
+        logger.debug("Attempt %d: %s => %s", attempt, description, full_command)
         try:
-            result = subprocess.run(
-                mpi_command, 
-                check=True, 
-                cwd=cwd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True
-            )
-            logger.debug(f"Successfully executed '{description}' in '{cwd}'.")
             if verbose:
-                logger.debug(f"STDOUT:\n{result.stdout}")
-                logger.debug(f"STDERR:\n{result.stderr}")
+                with open(output_log, 'a') as out:
+                    subprocess.run(mpi_command, check=True, cwd=cwd, stdout=out, stderr=subprocess.STDOUT)
+            else:
+                subprocess.run(mpi_command, check=True, cwd=cwd,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            logger.debug("Successfully executed '%s' in '%s'.", description, cwd)
+            if verbose:
+                logger.debug("Output of '%s' written to '%s'.", description, output_log)
             return  # success => exit function
         except subprocess.CalledProcessError as e:
             # It's an error => log at INFO so user sees it
-            logger.info(f"Attempt {attempt} failed for '{description}' in '{cwd}': {e.stderr}")
+            details = e.stderr.decode(errors="replace").strip() if e.stderr else f"see '{output_log}'"
+            logger.info(f"Attempt {attempt} failed for '{description}' in '{cwd}': {details}")
+            if e.returncode in _PERMANENT_RETURN_CODES:
+                msg = f"'{description}' in '{cwd}' could not be executed (return code {e.returncode})."
+                logger.info(msg)
+                raise SimulationError(msg)
             if attempt < retries:
-                logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+                wait = delay * 2 ** (attempt - 1)
+                logger.info(f"Retrying in {wait} seconds...")
+                time.sleep(wait)
             else:
                 logger.info(f"All {retries} attempts failed for '{description}' in '{cwd}'.")
                 raise SimulationError(f"All {retries} attempts failed for '{description}' in '{cwd}'.")
 
-def validate_files(param_file_path, simulation_dir):
+def validate_files(dos_path, model_path):
     """
-    Validates the existence of required files before running simulations.
+    Validates the existence of the files required by the simulations
+    (the hybridization function 'dos' and the model file).
     """
-    logger.debug(f"Validating param file: {param_file_path} in {simulation_dir}")
-    try:
-        with open(param_file_path, 'r') as param_file:
-            lines = param_file.readlines()
-            dos_line = next((line for line in lines if line.startswith("dos=")), None)
-            model_line = next((line for line in lines if line.startswith("model=")), None)
-            
-            dos_path = dos_line.split("=",1)[1].strip() if dos_line else None
-            model_path = model_line.split("=",1)[1].strip() if model_line else None
-            
-            missing_files = []
-            if dos_path:
-                if not os.path.isfile(dos_path):
-                    missing_files.append(dos_path)
-            else:
-                logger.info("Parameter 'dos' is missing in param file.")
-                raise SimulationError("Parameter 'dos' is missing in param file.")
-            
-            if model_path:
-                if not os.path.isfile(model_path):
-                    missing_files.append(model_path)
-            else:
-                logger.info("Parameter 'model' is missing in param file.")
-                raise SimulationError("Parameter 'model' is missing in param file.")
-            
-            if missing_files:
-                for file in missing_files:
-                    logger.info(f"Required file not found: {file}")
-                raise SimulationError("One or more required files are missing.")
-    except SimulationError:
-        raise
-    except Exception as e:
-        logger.info(f"Error validating files: {e}")
-        raise SimulationError(f"Error validating files: {e}")
+    logger.debug("Validating input files: %s, %s", dos_path, model_path)
+    missing_files = [path for path in (dos_path, model_path) if not os.path.isfile(path)]
+    if missing_files:
+        for file in missing_files:
+            logger.info(f"Required file not found: {file}")
+        raise SimulationError("One or more required files are missing.")
 
 def run_simulation(z, simulation_dir, params, verbose=False):
     """
@@ -200,13 +216,11 @@ def run_simulation(z, simulation_dir, params, verbose=False):
         # We'll show these lines at INFO => user sees them if all is well
         logger.info(f"--- Processing z = {z} in directory {simulation_dir} ---")
 
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        simulation_path = os.path.join(project_root, simulation_dir)
-        os.makedirs(simulation_path, exist_ok=True)
-        logger.debug(f"Output directory '{simulation_dir}' created at '{simulation_path}'")
+        simulation_path = os.path.join(_PROJECT_ROOT, simulation_dir)
+        _ensure_dir(simulation_path)
+        logger.debug("Output directory '%s' created at '%s'", simulation_dir, simulation_path)
         
-        param_file = generate_param(z, simulation_path)
-        validate_files(param_file, simulation_path)
+        generate_param(z, simulation_path)
         
         verify_command('nrginit')
         verify_command('nrg')
@@ -217,8 +231,11 @@ def run_simulation(z, simulation_dir, params, verbose=False):
         # nrg (with MPI)
         execute_command(['nrg'], f"nrg for z={z}", cwd=simulation_path, verbose=verbose, use_mpi=True)
         
-        dir_contents = os.listdir(simulation_path)
-        logger.debug(f"Contents of {simulation_dir}: {dir_contents}")
+        # The directory listing is only for the debug log => skip it otherwise
+        if logger.isEnabledFor(logging.DEBUG):
+            with os.scandir(simulation_path) as entries:
+                dir_contents = [entry.name for entry in entries]
+            logger.debug("Contents of %s: %s", simulation_dir, dir_contents)
         
         # This line is also at INFO => user sees it for success
         logger.info(f"--- Completed z = {z} in directory {simulation_dir} ---\n")
@@ -226,24 +243,57 @@ def run_simulation(z, simulation_dir, params, verbose=False):
     except SimulationError as e:
         # If there's a simulation-level error, we log at INFO => user sees it
         logger.info(f"Simulation error during simulation for z={z}: {e}")
+        raise
     except Exception as e:
         # Unexpected error => also log at INFO
         logger.info(f"Unexpected error during simulation for z={z}: {e}")
-        # Continue with other simulations
+        raise SimulationError(f"Unexpected error during simulation for z={z}: {e}")
+
+def _z_parallelism(Nz):
+    """
+    Number of z-steps run at the same time: DYNAMEANX_ZPAR if set, otherwise
+    cpu_count // 4 (each nrg runs with 4 MPI ranks); between 1 and Nz.
+    """
+    workers = _env_number("DYNAMEANX_ZPAR", max(1, (os.cpu_count() or 1) // 4))
+    return max(1, min(workers, Nz))
 
 def run_all_simulations(params, verbose=False):
     """
-    Runs all simulations sequentially based on the defined z-steps.
+    Runs the simulations of all z-steps. Each z-step has its own directory and
+    independent nrginit/nrg runs, so up to _z_parallelism(Nz) of them are
+    executed concurrently.
+
+    Raises:
+        SimulationError: If any z-step failed (after all of them have finished).
     """
     Nz = params.get("Nz", 4)  # default to 4 if not specified
     
     step_size = 1.0 / Nz
     z_values = [round(step_size * (i + 1), 8) for i in range(Nz)]
+    workers = _z_parallelism(Nz)
+
+    # Delta.dat and model.m are shared by all z-steps => check them once,
+    # before any simulation is started
+    validate_files(os.path.join(_PROJECT_ROOT, 'Delta.dat'), os.path.join(_PROJECT_ROOT, 'model.m'))
     
     # We'll show this line at INFO => if it goes right, user sees only this line
-    logger.info("Starting simulations sequentially.")
-    logger.debug(f"z values to process: {z_values}")
+    logger.info(f"Starting simulations ({workers} z-steps at a time).")
+    logger.debug("z values to process: %s", z_values)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_simulation, z, str(index), params, verbose=verbose): z
+            for index, z in enumerate(z_values, start=1)
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception:
+                # Already logged by run_simulation
+                failed.append(futures[future])
 
-    for index, z in enumerate(z_values, start=1):
-        simulation_dir = str(index)
-        run_simulation(z, simulation_dir, params, verbose=verbose)
\ No newline at end of file
+    if failed:
+        msg = f"Simulation failed for z = {sorted(failed)}"
+        logger.info(msg)
+        raise SimulationError(msg)
\ No newline at end of file